@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import threading
 from collections import OrderedDict
+from types import MappingProxyType
 
+from . import changes, indexes
+from .accept import AcceptLanguage, parse_accept_language
+from .cache import LRUCache
+from .changes import Change, Changeset
 from .parser import BCP47Parser
-from .code import BCP47Code
+from .code import BCP47Code, BCP47Result
 from .exceptions import BCP47Exception
+from .index import BCP47IndexParser
+from .matching import LanguageMatcher
+from .query import FieldIndex, Query
+from .search import DescriptionIndex, SearchResult
 
 
 class BCP47(object):
@@ -12,7 +23,9 @@ class BCP47(object):
     parser_class = BCP47Parser
     code_class = BCP47Code
 
-    def __init__(self):
+    def __init__(self, cache_size=None, cache_errors=False, strict=False,
+                 src_file=None, accept_language_cache_size=1024,
+                 likely_subtags_file=None, likely_subtags_cache_size=1024):
         self.mapping = dict(
             languages=("language", ),
             extlangs=("extlang", ),
@@ -21,28 +34,355 @@ class BCP47(object):
             variants=("variant", ),
             grandfathereds=("grandfathered", "Tag"),
             redundants=("redundant", "Tag"))
+        self._tags = {}
+        self._indexes = {}
+        self._builders = {}
+        # registry file to load, defaults to the bundled registry
+        self.src_file = src_file
+        # serializes loading the registry, lookups only take it while
+        # the first registry is loading
+        self._lock = threading.Lock()
+        # opt-in cache of constructed codes, keyed by the call arguments
+        self.cache = LRUCache(cache_size) if cache_size else None
+        self.cache_errors = cache_errors
+        # likely subtags data, in addition to the Suppress-Script of
+        # languages, and the cache of maximized and minimized codes
+        self.likely_subtags_file = likely_subtags_file
+        self.likely_subtags_cache = (
+            LRUCache(likely_subtags_cache_size)
+            if likely_subtags_cache_size
+            else None)
+        # parsed Accept-Language headers, keyed by the whole header
+        self.accept_language_cache = (
+            LRUCache(accept_language_cache_size)
+            if accept_language_cache_size
+            else None)
+        # check extlangs and variants against their registered prefixes
+        self.strict = strict
 
     def __getitem__(self, k):
-        return self._parsed_tags(*self.mapping[k])
+        # tables are built once per registry load and shared read-only
+        tables = self._tags
+        tags = tables.get(k)
+        if tags is None:
+            tags = tables[k] = MappingProxyType(
+                self._parsed_tags(*self.mapping[k]))
+        return tags
 
     def __call__(self, *args, **kwargs):
-        return self.code_class(self, *args, **kwargs)
+        if self.cache is None:
+            return self.code_class(self, *args, **kwargs)
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            cached = self.cache.get(key)
+        except TypeError:
+            # unhashable args
+            return self.code_class(self, *args, **kwargs)
+        if cached is not None:
+            code, error = cached
+            if error is not None:
+                raise BCP47Exception(error)
+            return code
+        try:
+            code = self.code_class(self, *args, **kwargs)
+        except BCP47Exception as e:
+            if self.cache_errors:
+                self.cache.set(key, (None, e.args[0]))
+            raise
+        self.cache.set(key, (code, None))
+        return code
 
     @property
     def parsed(self):
+        parser = self._parser
+        if parser is None:
+            # only the first load takes the lock, and only one thread
+            # parses while any others wait for it
+            with self._lock:
+                parser = self._parser
+                if parser is None:
+                    parser = self._parser = self._new_parser()
+        return parser.parsed
+
+    @property
+    def prefixes(self):
+        return self._index("prefixes", indexes.prefixes)
+
+    @property
+    def description_index(self):
+        return self._index("description_index", DescriptionIndex)
+
+    @property
+    def fallback_chains(self):
+        return self._index("fallback_chains", indexes.fallback_chains)
+
+    @property
+    def folded_subtags(self):
+        return self._index("folded_subtags", indexes.FoldedSubtags)
+
+    @property
+    def likely_subtags(self):
+        return self._index("likely_subtags", indexes.likely_subtags)
+
+    @property
+    def preferred_values(self):
+        return self._index("preferred_values", indexes.preferred_values)
+
+    def accept_language(self, header):
+        cache = self.accept_language_cache
+        if cache is None:
+            return parse_accept_language(self, header)
+        ranges = cache.get(header)
+        if ranges is None:
+            ranges = parse_accept_language(self, header)
+            cache.set(header, ranges)
+        return ranges
+
+    def query(self, table):
+        # a Query of all the records of a table, to be narrowed with
+        # where, exclude and between
+        return Query(self, table)
+
+    def field_index(self, table, field):
+        return self._index(
+            ("field", table, field),
+            lambda bcp47: FieldIndex(bcp47[table], field))
+
+    def search(self, query, types=None, limit=20):
+        # registry records by the words of their Description, types
+        # optionally limits the record types searched
+        return self.description_index.search(query, types, limit)
+
+    def matcher(self, tags):
+        # compiles the supported tags for RFC 4647 filtering and lookup
+        return LanguageMatcher(self, tags)
+
+    async def aload(self, src_file=None, if_newer=False, executor=None):
+        # loads the registry in an executor, so that the event loop is not
+        # blocked while it is parsed. asyncio is only imported by those
+        # using it
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, self.load, src_file, if_newer)
+
+    async def avalidate_many(self, tags, canonicalize=False, chunk_size=100):
+        # returns a list of BCP47Result, yielding to the event loop after
+        # every chunk_size tags
+        import asyncio
         if self._parser is None:
-            self._parser = self.parser_class()
-        return self._parser.parsed
+            await self.aload(if_newer=True)
+        results = []
+        for result in self.validate_many(tags, canonicalize):
+            results.append(result)
+            if not len(results) % chunk_size:
+                await asyncio.sleep(0)
+        return results
+
+    def canonicalize_many(self, tags):
+        return self.validate_many(tags, canonicalize=True)
+
+    def validate_many(self, tags, canonicalize=False, dedupe_size=10000):
+        # yields a BCP47Result for each tag, in order. Repeated tags are
+        # only validated once per dedupe_size distinct tags, so that the
+        # results kept for long streams of tags are bounded.
+        results = {}
+        validate = self.code_class.validate
+        for tag in tags:
+            result = results.get(tag)
+            if result is None:
+                if len(results) >= dedupe_size:
+                    results.clear()
+                result = results[tag] = validate(self, tag, canonicalize)
+            yield result
+
+    def load(self, src_file=None, if_newer=False):
+        # builds every table and index of the registry in src_file to one
+        # side and swaps them in together. Lookups in progress keep the
+        # tables they already hold. Returns False if if_newer is set and
+        # the registry File-Date is not newer than the loaded one.
+        src_file = src_file or self.src_file
+        with self._lock:
+            staging = copy.copy(self)
+            staging.cache = None
+            staging.src_file = src_file
+            staging._parser = staging._new_parser()
+            current = self._parser
+            if if_newer and current is not None:
+                if (staging._parser.file_date or "") <= (
+                        current.file_date or ""):
+                    return False
+            staging._tags = {}
+            staging._indexes = {}
+            parsed = staging.parsed
+            for k, args in self.mapping.items():
+                if args[0] in parsed:
+                    staging[k]
+            for name, build in list(self._builders.items()):
+                staging._index(name, build)
+            # subtags are folded here too, rather than by the first
+            # validation after the swap
+            staging.folded_subtags.fold(staging._tags)
+            # a single dict update, so readers see either the old or the
+            # new registry
+            self.__dict__.update(
+                src_file=src_file,
+                _parser=staging._parser,
+                _tags=staging._tags,
+                _indexes=staging._indexes)
+        self._clear_caches()
+        return True
+
+    def load_background(self, src_file=None, if_newer=False):
+        thread = threading.Thread(
+            target=self.load,
+            args=(src_file, if_newer),
+            daemon=True)
+        thread.start()
+        return thread
+
+    def diff(self, src_file):
+        # a Changeset from the loaded registry to the registry in src_file
+        self.parsed  # loads the registry if it is not loaded yet
+        return changes.diff(self._parser, self.parser_class(src_file))
+
+    def apply(self, changeset):
+        # brings the loaded registry up to the newer registry of a
+        # Changeset from diff. Tables with changes are updated from the
+        # changed records, and only the indexes built from them are
+        # rebuilt, the rest are kept. Returns the names of the tables
+        # with changes.
+        self.parsed  # loads the registry if it is not loaded yet
+        with self._lock:
+            current = self._parser
+            if (current.file_date or "") != (changeset.old_file_date or ""):
+                raise BCP47Exception(
+                    "Changeset from registry '%s' does not apply to "
+                    "registry '%s'"
+                    % (changeset.old_file_date, current.file_date))
+            if changeset.src_file is None:
+                raise BCP47Exception(
+                    "Changeset has no registry file to apply")
+            staging = copy.copy(self)
+            staging.cache = None
+            staging.src_file = changeset.src_file
+            # tables which are not built yet are built from the newer
+            # registry when they are first used, so it must still be the
+            # registry the changeset was made from
+            staging._parser = staging._new_parser()
+            if (staging._parser.file_date or "") != (
+                    changeset.new_file_date or ""):
+                raise BCP47Exception(
+                    "Registry '%s' is '%s', not '%s' as when the changeset "
+                    "was made"
+                    % (changeset.src_file,
+                       staging._parser.file_date,
+                       changeset.new_file_date))
+            types = {args[0]: table for table, args in self.mapping.items()}
+            tables = frozenset(
+                types[type_]
+                for type_
+                in changeset.types
+                if type_ in types)
+            staging._tags = {
+                table: tags
+                for table, tags
+                in self._tags.items()
+                if table not in tables}
+            updated = {
+                table: OrderedDict(self._tags[table])
+                for table
+                in tables
+                if table in self._tags}
+            for change in changeset:
+                tags = updated.get(types.get(change.type))
+                if tags is None:
+                    continue
+                if change.new is None:
+                    tags.pop(change.key, None)
+                else:
+                    tags[change.key] = change.new
+            for table, tags in updated.items():
+                staging._tags[table] = MappingProxyType(tags)
+            staging._indexes = {}
+            for name, index in self._indexes.items():
+                depends = indexes.index_tables(name)
+                if depends is not None and tables.isdisjoint(depends):
+                    staging._indexes[name] = index
+                elif hasattr(index, "updated"):
+                    staging._indexes[name] = index.updated(staging, tables)
+            for name, build in list(self._builders.items()):
+                staging._index(name, build)
+            # the changed tables dropped from the folded subtags are
+            # folded again before the swap, see load
+            folded = staging._indexes.get("folded_subtags")
+            if folded is not None:
+                folded.fold(staging._tags)
+            self.__dict__.update(
+                src_file=staging.src_file,
+                _parser=staging._parser,
+                _tags=staging._tags,
+                _indexes=staging._indexes)
+        self._clear_caches()
+        return tables
+
+    def validate_parallel(self, tags, canonicalize=False, processes=None,
+                          chunk_size=1000, ordered=True):
+        # multiprocessing is only imported by those using it
+        from . import parallel
+        return parallel.validate_parallel(
+            self, tags, canonicalize=canonicalize, processes=processes,
+            chunk_size=chunk_size, ordered=ordered)
+
+    def validate_file(self, path, canonicalize=False, processes=None,
+                      chunk_size=1000, ordered=True):
+        from . import parallel
+        return parallel.validate_file(
+            self, path, canonicalize=canonicalize, processes=processes,
+            chunk_size=chunk_size, ordered=ordered)
+
+    def reload(self):
+        self.__dict__.update(_parser=None, _tags={}, _indexes={})
+        self._clear_caches()
+
+    def _clear_caches(self):
+        for cache in (self.cache,
+                      self.accept_language_cache,
+                      self.likely_subtags_cache):
+            if cache is not None:
+                cache.clear()
+
+    def _index(self, name, build):
+        # indexes are built from the tables once per registry load
+        indexes = self._indexes
+        index = indexes.get(name)
+        if index is None:
+            self._builders[name] = build
+            index = indexes[name] = build(self)
+        return index
+
+    def _new_parser(self):
+        if self.src_file is None:
+            return self.parser_class()
+        return self.parser_class(self.src_file)
 
     def _parsed_tags(self, tag, key="Subtag"):
+        parsed = self.parsed
+        # parsers which index the registry themselves can serve the
+        # tables directly, without materializing every record
+        tags = getattr(self._parser, "tags", None)
+        if tags is not None:
+            return tags(tag, key)
         return OrderedDict(
             [(x[key], x)
              for x
-             in self.parsed[tag]])
+             in parsed[tag]])
 
 
 bcp47 = BCP47()
 
 
 __all__ = (
-    "bcp47", "BCP47", "BCP47Code", "BCP47Exception", "BCP47Parser")
+    "AcceptLanguage", "bcp47", "BCP47", "BCP47Code", "BCP47Exception",
+    "BCP47IndexParser", "BCP47Parser", "BCP47Result", "Change", "Changeset",
+    "LanguageMatcher", "Query", "SearchResult")
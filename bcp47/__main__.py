@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import sys
+
+from . import bcp47, changes
+
+
+def snapshot(args):
+    parser = bcp47.parser_class()
+    if args.output is None and parser.snapshot_file is None:
+        return "%s has no snapshot file" % parser.__class__.__name__
+    # always compile from the text registry, never from a stale snapshot
+    parser.parsed = parser.parse_src()
+    print(parser.write_snapshot(args.output))
+
+
+def diff(args):
+    changeset = changes.diff(
+        bcp47.parser_class(args.old), bcp47.parser_class(args.new))
+    if args.json:
+        print(json.dumps(changeset.as_dict(), indent=2))
+        return
+    for change in changeset:
+        print("%s %s %s" % (change.kind, change.type, change.key))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bcp47")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    snapshot_parser = commands.add_parser(
+        "snapshot",
+        help="compile the registry into a binary snapshot")
+    snapshot_parser.add_argument(
+        "-o", "--output",
+        help="path to write the snapshot to")
+    snapshot_parser.set_defaults(func=snapshot)
+    diff_parser = commands.add_parser(
+        "diff",
+        help="list the changed records between two registry files")
+    diff_parser.add_argument("old", help="path to the older registry")
+    diff_parser.add_argument("new", help="path to the newer registry")
+    diff_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the changeset as json")
+    diff_parser.set_defaults(func=diff)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+# Parsing of HTTP Accept-Language headers, RFC 7231 section 5.3.5, into a
+# priority list of validated language ranges.
+
+from collections import namedtuple
+
+
+AcceptLanguage = namedtuple("AcceptLanguage", ["tag", "lang_code", "quality"])
+
+
+def quality(params):
+    # returns None if the weight is malformed
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() != "q":
+            continue
+        try:
+            q = float(value.strip())
+        except ValueError:
+            return
+        return q if 0 <= q <= 1 else None
+    return 1.0
+
+
+def parse_accept_language(bcp47, header):
+    # returns AcceptLanguage ranges ordered by quality, keeping the header
+    # order for equal qualities. Invalid ranges, and ranges with a
+    # quality of 0, are dropped.
+    validate = bcp47.code_class.validate
+    ranges = []
+    for item in header.split(","):
+        tag, *params = item.split(";")
+        # optional whitespace is spaces and tabs, RFC 7230 section 3.2.3
+        tag = tag.strip(" \t")
+        if not tag:
+            continue
+        q = quality(params)
+        if not q:
+            continue
+        if tag == "*":
+            ranges.append(AcceptLanguage(tag, tag, q))
+            continue
+        result = validate(bcp47, tag)
+        if result.error is None:
+            ranges.append(AcceptLanguage(tag, result.lang_code, q))
+    ranges.sort(key=lambda accepted: -accepted.quality)
+    return tuple(ranges)
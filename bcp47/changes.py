@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Differences between two versions of the registry, record by record,
+# keyed by record type and subtag, or tag for grandfathered and redundant
+# tags. A Changeset can be applied to a BCP47 instance that has the older
+# registry loaded, see BCP47.apply, which only rebuilds the tables and
+# indexes it affects.
+
+from collections import OrderedDict, namedtuple
+
+from .records import make_record
+
+
+ADDED = "added"
+REMOVED = "removed"
+DEPRECATED = "deprecated"
+CHANGED = "changed"
+
+Change = namedtuple("Change", ["type", "key", "kind", "old", "new"])
+
+
+def record_key(record):
+    return record.get("Subtag", record.get("Tag"))
+
+
+def change_kind(old, new):
+    if old is None:
+        return ADDED
+    if new is None:
+        return REMOVED
+    if new.get("Deprecated") and not old.get("Deprecated"):
+        return DEPRECATED
+    return CHANGED
+
+
+class Changeset(object):
+
+    def __init__(self, changes, old_file_date=None, new_file_date=None,
+                 src_file=None):
+        self.changes = tuple(changes)
+        self.old_file_date = old_file_date
+        self.new_file_date = new_file_date
+        # the newer registry, which the changeset brings a BCP47 up to
+        self.src_file = src_file
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __repr__(self):
+        return (
+            "<%s.%s '%s..%s' %s changes />"
+            % (self.__module__,
+               self.__class__.__name__,
+               self.old_file_date,
+               self.new_file_date,
+               len(self)))
+
+    @property
+    def added(self):
+        return self.of_kind(ADDED)
+
+    @property
+    def removed(self):
+        return self.of_kind(REMOVED)
+
+    @property
+    def deprecated(self):
+        return self.of_kind(DEPRECATED)
+
+    @property
+    def changed(self):
+        return self.of_kind(CHANGED)
+
+    @property
+    def types(self):
+        return frozenset(change.type for change in self.changes)
+
+    def of_kind(self, kind):
+        return tuple(change for change in self.changes if change.kind == kind)
+
+    def keys(self, type_):
+        # subtags or tags of a type with any change
+        return frozenset(
+            change.key
+            for change
+            in self.changes
+            if change.type == type_)
+
+    def as_dict(self):
+        # plain data, eg to be dumped as json
+        return dict(
+            old_file_date=self.old_file_date,
+            new_file_date=self.new_file_date,
+            src_file=self.src_file,
+            changes=[
+                dict(
+                    type=change.type,
+                    key=change.key,
+                    kind=change.kind,
+                    old=None if change.old is None else dict(change.old),
+                    new=None if change.new is None else dict(change.new))
+                for change
+                in self.changes])
+
+    @classmethod
+    def from_dict(cls, data):
+
+        def record(change, k):
+            values = change[k]
+            if values is not None:
+                return make_record(change["type"], values)
+
+        return cls(
+            [Change(
+                change["type"], change["key"], change["kind"],
+                record(change, "old"), record(change, "new"))
+             for change
+             in data["changes"]],
+            data.get("old_file_date"),
+            data.get("new_file_date"),
+            data.get("src_file"))
+
+
+def diff(old, new):
+    # a Changeset from the registry parsed by the old parser to that
+    # parsed by the new one. Changes are in the order of the new registry,
+    # with removed records after those of their type.
+    changes = []
+    types = list(new.parsed)
+    types.extend(type_ for type_ in old.parsed if type_ not in types)
+    for type_ in types:
+        old_records = OrderedDict(
+            (record_key(record), record)
+            for record
+            in old.parsed.get(type_, ()))
+        for record in new.parsed.get(type_, ()):
+            key = record_key(record)
+            previous = old_records.pop(key, None)
+            if previous is not None and previous == record:
+                continue
+            changes.append(Change(
+                type_, key, change_kind(previous, record), previous, record))
+        changes.extend(
+            Change(type_, key, REMOVED, record, None)
+            for key, record
+            in old_records.items())
+    return Changeset(changes, old.file_date, new.file_date, new.src_file)
@@ -1,26 +1,113 @@
+import re
+import sys
+from collections import namedtuple
+from functools import total_ordering
 
+from . import indexes
 from .exceptions import BCP47Exception
 
 
+# subtag syntax, see RFC 5646 section 2.1. Patterns end with \Z rather
+# than $, which would also match before a trailing newline
+_VARIANT = r"(?:[A-Za-z0-9]{5,8}|[0-9][A-Za-z0-9]{3})"
+_EXTENSION = r"[0-9A-WY-Za-wy-z](?:-[A-Za-z0-9]{2,8})+"
+_PRIVATEUSE = r"[xX](?:-[A-Za-z0-9]{1,8})+"
+LANGTAG_RE = re.compile(
+    r"([A-Za-z]{2,8})"
+    r"(?:-([A-Za-z]{3}))?"
+    r"(?:-([A-Za-z]{4}))?"
+    r"(?:-([A-Za-z]{2}|[0-9]{3}))?"
+    r"(?:-(%s(?:-%s)*))?"
+    r"(?:-(%s(?:-%s)*))?"
+    r"(?:-(%s))?\Z"
+    % (_VARIANT, _VARIANT, _EXTENSION, _EXTENSION, _PRIVATEUSE))
+LANGUAGE_RE = re.compile(r"[A-Za-z]{2,8}\Z")
+EXTENSION_RE = re.compile(r"%s(?:-%s)*\Z" % (_EXTENSION, _EXTENSION))
+PRIVATEUSE_RE = re.compile(r"%s\Z" % _PRIVATEUSE)
+SUBTAG_RE = re.compile(
+    r"(?P<singleton>[A-Za-z0-9])\Z"
+    r"|(?P<extlang>[A-Za-z]{3})\Z"
+    r"|(?P<script>[A-Za-z]{4})\Z"
+    r"|(?P<region>[A-Za-z]{2}|[0-9]{3})\Z"
+    r"|(?P<variant>%s)\Z" % _VARIANT)
+EXTENSION_SUBTAG_RE = re.compile(r"[A-Za-z0-9]{2,8}\Z")
+PRIVATEUSE_SUBTAG_RE = re.compile(r"[A-Za-z0-9]{1,8}\Z")
+
+_setattr = object.__setattr__
+
+
+class BCP47Result(namedtuple("BCP47Result", ("tag", "lang_code", "error"))):
+    __slots__ = ()
+
+    @property
+    def valid(self):
+        return self.error is None
+
+
+@total_ordering
 class BCP47Code(object):
-    _errors = None
-    _lang_code = None
     tag_parts = (
         "language",
         "extlang",
         "script",
         "region",
-        "variant")
+        "variant",
+        "extension",
+        "privateuse")
+    part_names = ("grandfathered", ) + tag_parts
+    # bounds the memo of fallback chains for each registry load
+    max_fallback_chains = 10000
+    # position of each part type, variants may be repeated
+    tag_positions = dict(
+        extlang=1,
+        script=2,
+        region=3,
+        variant=4,
+        extension=5,
+        privateuse=6)
+    __slots__ = (
+        ("_bcp47", "_hash", "_lang_code", "_grandfathered")
+        + tuple("_%s" % part for part in tag_parts))
 
     def __init__(self, bcp47, *args, **kwargs):
-        self.bcp47 = bcp47
-        self.kwargs = {}
+        # slots are assigned directly while constructing, bypassing the
+        # __setattr__ guard
+        _setattr(self, "_bcp47", bcp47)
+        _setattr(self, "_hash", None)
+        _setattr(self, "_lang_code", None)
         args = (
             args[0].split("-") + list(args[1:])
             if args and ("-" in args[0])
             else args)
         self.construct(*args, **kwargs)
 
+    def __copy__(self):
+        # codes are immutable
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, BCP47Code):
+            return NotImplemented
+        return self.lang_code == other.lang_code
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.lang_code)
+        return self._hash
+
+    def __lt__(self, other):
+        if not isinstance(other, BCP47Code):
+            return NotImplemented
+        return self.lang_code < other.lang_code
+
+    def __reduce__(self):
+        # the registry is not pickled with the code, which is rebuilt from
+        # its lang code with the default bcp47 instance
+        return (_unpickle_code, (self.__class__, self.lang_code))
+
     def __repr__(self):
         return (
             "<%s.%s '%s' />"
@@ -28,36 +115,91 @@ class BCP47Code(object):
                self.__class__.__name__,
                self.lang_code))
 
+    def __setattr__(self, k, v):
+        # codes are shared between callers when cached, so only the
+        # (private) state set up during construction may be assigned
+        if not k.startswith("_"):
+            raise AttributeError(
+                "'%s' object is immutable" % self.__class__.__name__)
+        super().__setattr__(k, v)
+
     def __str__(self):
         return self.lang_code
 
+    @property
+    def bcp47(self):
+        return self._bcp47
+
+    @property
+    def kwargs(self):
+        return {
+            part: getattr(self, "_%s" % part, None)
+            for part
+            in self.part_names
+            if getattr(self, "_%s" % part, None) is not None}
+
     @property
     def lang_code(self):
         return self._lang_code
 
+    @property
+    def parts(self):
+        return tuple(
+            getattr(self, "_%s" % part, None)
+            for part
+            in self.part_names)
+
     @property
     def extlang(self):
-        return self.kwargs.get("extlang")
+        return self._extlang
 
     @property
     def grandfathered(self):
-        return self.kwargs.get("grandfathered")
+        return self._grandfathered
 
     @property
     def language(self):
-        return self.kwargs.get("language")
+        return self._language
 
     @property
     def region(self):
-        return self.kwargs.get("region")
+        return self._region
 
     @property
     def script(self):
-        return self.kwargs.get("script")
+        return self._script
 
     @property
     def variant(self):
-        return self.kwargs.get("variant")
+        return self._variant
+
+    @property
+    def variants(self):
+        return tuple(self._variant.split("-")) if self._variant else ()
+
+    @property
+    def extension(self):
+        return self._extension
+
+    @property
+    def extensions(self):
+        # extension subtags by singleton
+        extensions = {}
+        if not self._extension:
+            return extensions
+        for part in self._extension.split("-"):
+            if len(part) == 1:
+                subtags = extensions[part] = []
+            else:
+                subtags.append(part)
+        return {
+            singleton: "-".join(subtags)
+            for singleton, subtags
+            in extensions.items()}
+
+    @property
+    def privateuse(self):
+        return self._privateuse
 
     def construct(self, *args, **kwargs):
         if args and kwargs:
@@ -71,61 +213,367 @@ class BCP47Code(object):
             return self.construct_from_args(*args)
         return self.construct_from_kwargs(**kwargs)
 
-    def _add_prefix(self, parts, args):
-        if self.bcp47["languages"].get(args[0]):
-            self.kwargs["language"] = args[0]
-            parts.append(args[0])
+    def canonicalize(self):
+        return self.bcp47(
+            "-".join(filter(None, self.canonical_parts(
+                self.bcp47, self.parts))))
+
+    def fallbacks(self, default=None):
+        # the chain of codes to try in turn when looking up resources for
+        # this code, with default appended if given
+        bcp47 = self.bcp47
+        chains = bcp47.fallback_chains
+        chain = chains.get(self.lang_code)
+        if chain is None:
+            chain = []
+            for tag in self.fallback_tags(bcp47, self.parts):
+                try:
+                    chain.append(bcp47(tag))
+                except BCP47Exception:
+                    continue
+            chain = tuple(chain)
+            if len(chains) < self.max_fallback_chains:
+                chains[self.lang_code] = chain
+        return chain if default is None else chain + (default, )
+
+    @classmethod
+    def fallback_tags(cls, bcp47, parts):
+        # truncates the canonical tag following the lookup rules of RFC
+        # 4647 section 3.4, then does the same with its macrolanguage in
+        # place of its language
+        subtags = "-".join(
+            filter(None, cls.canonical_parts(bcp47, parts))).split("-")
+        chains = [subtags]
+        language = bcp47["languages"].get(subtags[0])
+        if language and language.get("Macrolanguage"):
+            chains.append([language["Macrolanguage"]] + subtags[1:])
+        tags = []
+        for subtags in chains:
+            for i in range(len(subtags), 0, -1):
+                # truncated tags never end with a singleton
+                if len(subtags[i - 1]) > 1 or i == len(subtags):
+                    tag = "-".join(subtags[:i])
+                    if tag not in tags:
+                        tags.append(tag)
+        return tags
+
+    def maximize(self):
+        return self._likely("maximize", self.maximized_parts)
+
+    def minimize(self):
+        return self._likely("minimize", self.minimized_parts)
+
+    def _likely(self, name, build):
+        # results are cached by the bcp47 instance, if it has a cache
+        bcp47 = self.bcp47
+        cache = getattr(bcp47, "likely_subtags_cache", None)
+        key = (name, self.lang_code)
+        code = cache.get(key) if cache is not None else None
+        if code is None:
+            code = bcp47("-".join(filter(None, build(bcp47, self.parts))))
+            if cache is not None:
+                cache.set(key, code)
+        return code
+
+    @classmethod
+    def maximized_parts(cls, bcp47, parts):
+        # adds the likely script and region of a tag, following the Add
+        # Likely Subtags algorithm of Unicode TR35
+        parts = cls.canonical_parts(bcp47, parts)
+        (grandfathered, language, extlang, script, region,
+         variant, extension, privateuse) = parts
+        if grandfathered or not language:
+            return parts
+        likely = bcp47.likely_subtags
+        lookup = None if language == "und" else language
+        for key in ((lookup, script, region),
+                    (lookup, None, region),
+                    (lookup, script, None),
+                    (lookup, None, None),
+                    (None, script, None)):
+            match = likely.get(key)
+            if match is not None:
+                break
+        else:
+            return parts
+        return (
+            None, lookup or match[0] or language, None,
+            script or match[1], region or match[2],
+            variant, extension, privateuse)
+
+    @classmethod
+    def minimized_parts(cls, bcp47, parts):
+        # removes the script and region of a tag that would be added back
+        # by maximizing it, following the Remove Likely Subtags algorithm
+        # of Unicode TR35
+        maximized = cls.maximized_parts(bcp47, parts)
+        if maximized[0] or not maximized[1]:
+            return maximized
+        language, script, region = maximized[1], maximized[3], maximized[4]
+        rest = maximized[5:]
+        for trial in ((language, None, None),
+                      (language, None, region),
+                      (language, script, None)):
+            trial = (None, trial[0], None) + trial[1:] + (None, None, None)
+            if cls.maximized_parts(bcp47, trial)[1:5] == maximized[1:5]:
+                return trial[:5] + rest
+        return maximized
+
+    @classmethod
+    def canonical_parts(cls, bcp47, parts):
+        # replaces deprecated tags and subtags with their preferred
+        # values and orders extensions by singleton, see RFC 5646 section
+        # 4.5
+        preferred = bcp47.preferred_values
+        tag = preferred["tag"].get("-".join(filter(None, parts)))
+        if tag:
+            # preferred values are always valid tags
+            parts, _ = cls.tokenize(tag)
+        (grandfathered, language, extlang, script, region,
+         variant, extension, privateuse) = parts
+        if grandfathered:
+            return parts
+        if extlang:
+            language = preferred["extlang"].get(extlang, language)
+            extlang = None
+        if language:
+            language = preferred["language"].get(language, language)
+        if script:
+            script = preferred["script"].get(script, script)
+        if region:
+            region = preferred["region"].get(region, region)
+        if variant:
+            variant = "-".join([
+                preferred["variant"].get(part, part)
+                for part
+                in variant.split("-")])
+        if extension:
+            extensions = []
+            for part in extension.split("-"):
+                if len(part) == 1:
+                    extensions.append([part])
+                else:
+                    extensions[-1].append(part)
+            extension = "-".join(
+                "-".join(parts)
+                for parts
+                in sorted(extensions, key=lambda e: e[0].lower()))
+        return (
+            None, language, extlang, script, region,
+            variant, extension, privateuse)
+
+    @classmethod
+    def validate(cls, bcp47, tag, canonicalize=False):
+        parts, error = cls.validate_tag(bcp47, tag)
+        if error:
+            return BCP47Result(tag, None, error)
+        if canonicalize:
+            parts = cls.canonical_parts(bcp47, parts)
+        # the lang code is the tag in the case of its registered subtags
+        return BCP47Result(tag, "-".join(filter(None, parts)), None)
+
+    @classmethod
+    def validate_tag(cls, bcp47, tag):
+        # validates a tag without raising, returning its parts, as
+        # (grandfathered, language, extlang, script, region, variant,
+        # extension, privateuse), and an error message if any
+        parts, error = cls.tokenize(tag)
+        if not error:
+            parts, error = cls._registered_parts(bcp47, parts)
+        if error:
+            # grandfathered tags are matched whole, as they dont
+            # necessarily follow the subtag syntax. None of them are
+            # otherwise valid tags, so they are only checked on failure
+            grandfathered = cls._folded_subtags(bcp47)["grandfathereds"].get(
+                tag.lower())
+            if grandfathered is not None:
+                return (
+                    (grandfathered, ) + (None, ) * len(cls.tag_parts),
+                    None)
+        return parts, error
+
+    @classmethod
+    def tokenize(cls, tag):
+        # classifies the subtags of a tag by their shape and position in
+        # a single match, before the registry is consulted
+        match = LANGTAG_RE.match(tag)
+        if match is not None:
+            parts = (None, ) + match.groups()
+            error = parts[6] and cls._extension_error(parts[6])
+            return (None, error) if error else (parts, None)
+        match = PRIVATEUSE_RE.match(tag)
+        if match is not None:
+            return (None, ) * len(cls.tag_parts) + (match.group(), ), None
+        return None, cls._syntax_error(tag.split("-"))
+
+    @classmethod
+    def _extension_error(cls, extension):
+        # singletons can only be used once
+        singletons = set()
+        for part in extension.split("-"):
+            if len(part) != 1:
+                continue
+            if part.lower() in singletons:
+                return "Unrecognized tag part '%s'" % part
+            singletons.add(part.lower())
+
+    @classmethod
+    def _syntax_error(cls, parts):
+        # finds the first malformed or misplaced part of a tag
+        if not LANGUAGE_RE.match(parts[0]):
+            return "Language '%s' not recognized" % (parts[0])
+        position = 0
+        for part in parts[1:]:
+            match = SUBTAG_RE.match(part)
+            part_type = match and match.lastgroup
+            if position == cls.tag_positions["privateuse"]:
+                if not PRIVATEUSE_SUBTAG_RE.match(part):
+                    return "Unrecognized tag part '%s'" % part
+                continue
+            if part_type == "singleton":
+                position = cls.tag_positions[
+                    "privateuse"
+                    if part in "xX"
+                    else "extension"]
+                continue
+            if position == cls.tag_positions["extension"]:
+                if not EXTENSION_SUBTAG_RE.match(part):
+                    return "Unrecognized tag part '%s'" % part
+                continue
+            index = cls.tag_positions.get(part_type, -1)
+            if index < position or (index == position and index < 4):
+                return "Unrecognized tag part '%s'" % part
+            position = index
+        # eg a singleton without any subtags
+        return "Unrecognized tag part '%s'" % parts[-1]
+
+    @staticmethod
+    def _folded_subtags(bcp47):
+        # plain mappings of tables are folded on each use
+        folded = getattr(bcp47, "folded_subtags", None)
+        return indexes.FoldedSubtags(bcp47) if folded is None else folded
+
+    @classmethod
+    def _registered_parts(cls, bcp47, parts):
+        # returns the parts in the case of their registered subtags, see
+        # RFC 5646 section 2.1.1, and an error message if any. Extensions
+        # and private use subtags are not registered, so are only checked
+        # syntactically, and lowercased
+        language, extlang, script, region, variant = parts[1:6]
+        extension, privateuse = parts[6:]
+        if privateuse:
+            privateuse = privateuse.lower()
+        if language is None:
+            # private use tag
+            return parts[:7] + (privateuse, ), None
+        folded = cls._folded_subtags(bcp47)
+        registered = folded["languages"].get(language.lower())
+        if registered is None:
+            return parts, "Language '%s' not recognized" % language
+        language = registered
+        if extlang:
+            registered = folded["extlangs"].get(extlang.lower())
+            if registered is None:
+                return parts, "Unrecognized tag part '%s'" % extlang
+            extlang = registered
+        if script:
+            registered = folded["scripts"].get(script.lower())
+            if registered is None:
+                return parts, "Unrecognized tag part '%s'" % script
+            script = registered
+        if region:
+            registered = folded["regions"].get(region.lower())
+            if registered is None:
+                return parts, "Unrecognized tag part '%s'" % region
+            region = registered
+        if variant:
+            tags = folded["variants"]
+            variants = []
+            for part in variant.split("-"):
+                found = tags.get(part.lower())
+                # variants can only be used once
+                if found is None or found in variants:
+                    return parts, "Unrecognized tag part '%s'" % part
+                variants.append(found)
+            variant = "-".join(variants)
+        if extension:
+            extension = extension.lower()
+        parts = (
+            None, language, extlang, script, region,
+            variant, extension, privateuse)
+        if (extlang or variant) and getattr(bcp47, "strict", False):
+            return parts, cls._prefix_error(bcp47, parts)
+        return parts, None
+
+    @classmethod
+    def _prefix_error(cls, bcp47, parts):
+        # checks extlangs and variants against the prefixes they are
+        # registered with
+        language, extlang, script, region, variant = parts[1:6]
+        prefixes = bcp47.prefixes
+        if extlang:
+            allowed = prefixes["extlang"].get(extlang)
+            if allowed and language not in allowed:
+                return (
+                    "Extlang '%s' not allowed with prefix '%s'"
+                    % (extlang, language))
+        if not variant:
             return
-        if not self.bcp47["grandfathereds"].get(args[0]):
-            raise BCP47Exception(
-                "Language '%s' not recognized"
-                % (args[0]))
-        if args[1:]:
-            raise BCP47Exception(
-                "Grandfathered tags cannot have "
-                "further extensions - found '%s'"
-                % args[1:])
-        self.kwargs["grandfathered"] = args[0]
-        parts.append(args[0])
-
-    def _maybe_add_part(self, parts, tag_types, part):
-        for part_type in tag_types:
-            _part = self.bcp47["%ss" % part_type].get(part)
-            tag_types = tag_types[tag_types.index(part_type) + 1:]
-            if _part:
-                # probs need some specific code here
-                # for backchecking allowed prefixes etc
-                parts.append(part)
-                self.kwargs[part_type] = part
-                return _part, tag_types
-        return None, tag_types
+        prefix = "-".join(filter(None, (language, extlang, script, region)))
+        variant_prefixes = prefixes["variant"]
+        for part in variant.split("-"):
+            allowed = variant_prefixes.get(part)
+            # the tag so far or its language are usually allowed prefixes
+            # themselves, otherwise the subtags of each allowed prefix are
+            # looked for in the tag so far
+            if (allowed
+                    and prefix not in allowed
+                    and language not in allowed
+                    and not _has_prefix(prefix, allowed)):
+                return (
+                    "Variant '%s' not allowed with prefix '%s'"
+                    % (part, prefix))
+            prefix = "%s-%s" % (prefix, part)
 
     def construct_from_args(self, *args):
-        parts = []
-        self._add_prefix(parts, args)
-        args = args[1:]
-        if not args:
-            self._lang_code = "-".join(parts)
-            return
-        tag_types = self.tag_parts[1:]
-        for part in args:
-            if not tag_types:
-                raise BCP47Exception(
-                    "Unrecognized tag part '%s'" % part)
-            _part, tag_types = self._maybe_add_part(parts, tag_types, part)
-            if not _part:
-                raise BCP47Exception(
-                    "Unrecognized tag part '%s'" % part)
-        self._lang_code = "-".join(parts)
+        parts, error = self.validate_tag(self.bcp47, "-".join(args))
+        if error:
+            raise BCP47Exception(error)
+        self._set_parts(parts)
+        self._set_lang_code("-".join(filter(None, parts)))
 
     def _add_part(self, parts, part_type, name):
         if not name:
             return
-        if name not in self.bcp47["%ss" % part_type]:
-            raise BCP47Exception(
-                "%s '%s' not recognized"
-                % (part_type.capitalize(), name))
-        parts.append(name)
+        if part_type in ("extension", "privateuse"):
+            pattern = (
+                EXTENSION_RE
+                if part_type == "extension"
+                else PRIVATEUSE_RE)
+            error = (
+                None
+                if pattern.match(name)
+                else "Unrecognized tag part '%s'" % name)
+            if part_type == "extension":
+                error = error or self._extension_error(name)
+            if error:
+                raise BCP47Exception(error)
+            parts.append(name.lower())
+            return
+        names = (
+            name.split("-")
+            if part_type == "variant"
+            else [name])
+        tags = self._folded_subtags(self.bcp47)["%ss" % part_type]
+        registered = []
+        for _name in names:
+            found = tags.get(_name.lower())
+            if found is None:
+                raise BCP47Exception(
+                    "%s '%s' not recognized"
+                    % (part_type.capitalize(), _name))
+            registered.append(found)
+        parts.append("-".join(registered))
 
     def construct_from_kwargs(self, **kwargs):
         grandfathered = kwargs.get("grandfathered")
@@ -136,13 +584,62 @@ class BCP47Code(object):
             raise BCP47Exception(
                 "You can only specify either \"grandfather\" or language. "
                 "You provided \"%s\"." % ((grandfathered, language), ))
-        if not (grandfathered or language):
+        privateuse_only = (
+            not (grandfathered or language)
+            and set(k for k, v in kwargs.items() if v) == {"privateuse"})
+        if not (grandfathered or language or privateuse_only):
             raise BCP47Exception(
                 "Please specify \"grandfather\" or language")
+        # each part given is added in the case of its registered subtags
+        given = []
         for part in self.tag_parts:
             if grandfathered and part == "language":
+                given.append("grandfathered")
                 self._add_part(parts, "grandfathered", grandfathered)
                 break
+            if kwargs.get(part):
+                given.append(part)
             self._add_part(parts, part, kwargs.get(part))
-        self.kwargs = kwargs
-        self._lang_code = "-".join(parts)
+        kwargs = dict(kwargs, **dict(zip(given, parts)))
+        if getattr(self.bcp47, "strict", False) and not grandfathered:
+            error = self._prefix_error(
+                self.bcp47,
+                tuple(kwargs.get(part) for part in self.part_names))
+            if error:
+                raise BCP47Exception(error)
+        self._set_kwargs(kwargs)
+        self._set_lang_code("-".join(parts))
+
+    def _set_kwargs(self, kwargs):
+        self._set_parts(tuple(kwargs.get(part) for part in self.part_names))
+
+    def _set_parts(self, parts):
+        # subtags and lang codes are interned, so that the many codes
+        # built for the same tag share their strings
+        for slot, value in zip(self._part_slots, parts):
+            slot.__set__(
+                self,
+                sys.intern(value) if isinstance(value, str) else value)
+
+    def _set_lang_code(self, lang_code):
+        lang_code = sys.intern(lang_code)
+        _setattr(self, "_lang_code", lang_code)
+        _setattr(self, "_hash", hash(lang_code))
+
+
+# the slot of each part, set without going through __setattr__
+BCP47Code._part_slots = tuple(
+    BCP47Code.__dict__["_%s" % part]
+    for part
+    in BCP47Code.part_names)
+
+
+def _has_prefix(tag, allowed):
+    # whether the subtags of any of the allowed prefixes are all in tag
+    subtags = set(tag.split("-"))
+    return any(prefix <= subtags for prefix in allowed.values())
+
+
+def _unpickle_code(cls, lang_code):
+    from . import bcp47
+    return cls(bcp47, lang_code)
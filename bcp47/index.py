@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+import json
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import partial
+
+from .parser import BCP47Parser
+
+
+# bump this whenever the layout of the index file changes
+INDEX_VERSION = 1
+INDEX_MAGIC = b"BCP47IDX"
+
+# magic, version, number of types, file date offset, file date length
+HEADER = struct.Struct("<8sIIII")
+# type name offset, type name length, first entry offset, entry count
+TYPE = struct.Struct("<IIII")
+# key offset, key length, record offset, record length
+ENTRY = struct.Struct("<IIII")
+
+
+class IndexedTags(Mapping):
+    # read-only view of the records of one type in an index file. Keys
+    # are sorted, lookups are a binary search over the fixed size entries
+    # and records are only decoded when they are accessed.
+
+    def __init__(self, index, offset, count, make_record=None):
+        self._index = index
+        self._offset = offset
+        self._count = count
+        self._make_record = make_record
+
+    def __contains__(self, k):
+        return self._find(k) is not None
+
+    def __getitem__(self, k):
+        entry = self._find(k)
+        if entry is None:
+            raise KeyError(k)
+        return self._record(entry)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._key(self._entry(i)).decode("utf-8")
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(
+            self._index, self._offset + i * ENTRY.size)
+
+    def _find(self, k):
+        if not isinstance(k, str):
+            return
+        k = k.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(self._entry(mid)) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            entry = self._entry(lo)
+            if self._key(entry) == k:
+                return entry
+
+    def _key(self, entry):
+        return self._index[entry[0]:entry[0] + entry[1]]
+
+    def _record(self, entry):
+        record = json.loads(
+            self._index[entry[2]:entry[2] + entry[3]].decode("utf-8"))
+        if self._make_record is not None:
+            record = self._make_record(record)
+        return record
+
+
+class BCP47IndexParser(BCP47Parser):
+    # Parser backend which compiles the registry into a sorted, fixed
+    # layout index file and opens it with mmap, so that processes using
+    # the same index share its pages rather than holding their own
+    # copies of every record.
+    index_filename = "iana-bcp47.index"
+    _index = None
+    _index_file = None
+    _types = None
+
+    def __init__(self, src_file=None, snapshot_file=None, index_file=None):
+        # index_file defaults to index_filename next to src_file
+        self._index_file = index_file
+        super().__init__(src_file, snapshot_file)
+
+    @property
+    def index_file(self):
+        if self._index_file is not None:
+            return self._index_file
+        return os.path.join(
+            os.path.dirname(self.src_file),
+            self.index_filename)
+
+    def parse_bcp(self):
+        if not self.load_index():
+            super().parse_bcp()
+            try:
+                self.write_index()
+            except OSError:
+                # eg the directory of the index is not writable, the
+                # records parsed from the registry are used instead
+                return
+            if not self.load_index():
+                raise OSError(
+                    "Unable to load index file '%s'" % self.index_file)
+        self.parsed = {
+            tag: self.tags(tag).values()
+            for tag
+            in self._types}
+
+    def load_index(self):
+        path = self.index_file
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            try:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty file
+                return False
+        try:
+            types = self._index_types(index)
+        except (struct.error, UnicodeDecodeError):
+            # truncated or corrupt file
+            types = None
+        if types is None:
+            index.close()
+            return False
+        self._index = index
+        self._types = types
+        return True
+
+    def _index_types(self, index):
+        # the entries of each type in index, or None if index is not for
+        # the current registry file
+        magic, version, count, date_offset, date_length = (
+            HEADER.unpack_from(index))
+        if (magic, version) != (INDEX_MAGIC, INDEX_VERSION):
+            return
+        file_date = index[date_offset:date_offset + date_length]
+        if file_date.decode("utf-8") != (self.file_date or ""):
+            return
+        types = {}
+        for i in range(count):
+            name_offset, name_length, offset, entries = TYPE.unpack_from(
+                index, HEADER.size + i * TYPE.size)
+            name = index[name_offset:name_offset + name_length]
+            types[name.decode("utf-8")] = (offset, entries)
+        return types
+
+    def tags(self, tag, key=None):
+        # records are keyed by their Subtag, or Tag for grandfathered and
+        # redundant tags
+        if self._index is None:
+            # the index could not be written, see parse_bcp
+            return OrderedDict(
+                (record.get(key or "Subtag", record.get("Tag")), record)
+                for record
+                in self.parsed[tag])
+        return IndexedTags(
+            self._index,
+            *self._types[tag],
+            make_record=partial(self.make_record, tag))
+
+    def write_index(self, path=None):
+        path = path or self.index_file
+        pool = bytearray()
+
+        def add(value):
+            offset = len(pool)
+            value = value.encode("utf-8")
+            pool.extend(value)
+            return offset, len(value)
+
+        types = []
+        for tag, records in self.parsed.items():
+            entries = []
+            for record in records:
+                entries.append(
+                    add(record.get("Subtag", record.get("Tag")))
+                    + add(json.dumps(dict(record), separators=(",", ":"))))
+            entries.sort(key=lambda e: pool[e[0]:e[0] + e[1]])
+            types.append((add(tag), entries))
+
+        file_date = add(self.file_date or "")
+        count = sum(len(entries) for _, entries in types)
+        start = HEADER.size + len(types) * TYPE.size
+        pool_offset = start + count * ENTRY.size
+
+        def pooled(offset, length):
+            return pool_offset + offset, length
+
+        data = bytearray(HEADER.pack(
+            INDEX_MAGIC, INDEX_VERSION, len(types), *pooled(*file_date)))
+        entry_offset = start
+        for name, entries in types:
+            data.extend(TYPE.pack(
+                *pooled(*name), entry_offset, len(entries)))
+            entry_offset += len(entries) * ENTRY.size
+        for _, entries in types:
+            for key_offset, key_length, offset, length in entries:
+                data.extend(ENTRY.pack(
+                    *(pooled(key_offset, key_length)
+                      + pooled(offset, length))))
+        data.extend(pool)
+
+        tmp_path = "%s.%s.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Indexes derived from the registry tables. Each is built once per
+# registry load by the BCP47 instance, see BCP47._index.
+
+import json
+import re
+from sys import intern
+from types import MappingProxyType
+
+
+# the tables each index is built from. Indexes not listed are rebuilt
+# when any table changes, see BCP47.apply
+INDEX_TABLES = dict(
+    preferred_values=(
+        "languages", "extlangs", "scripts", "regions", "variants",
+        "grandfathereds", "redundants"),
+    prefixes=("extlangs", "variants"),
+    likely_subtags=("languages", ))
+
+
+def index_tables(name):
+    # field indexes are named ("field", table, field)
+    if isinstance(name, tuple) and name[0] == "field":
+        return (name[1], )
+    return INDEX_TABLES.get(name)
+
+
+def preferred_values(bcp47):
+    # replacement subtags by part type, and replacement tags for whole
+    # grandfathered and redundant tags
+    values = {}
+    for part_type in ("language", "extlang", "script", "region", "variant"):
+        values[part_type] = MappingProxyType({
+            subtag: record["Preferred-Value"]
+            for subtag, record
+            in bcp47["%ss" % part_type].items()
+            if record.get("Preferred-Value")})
+    values["tag"] = MappingProxyType({
+        tag: record["Preferred-Value"]
+        for table in ("grandfathereds", "redundants")
+        for tag, record
+        in bcp47[table].items()
+        if record.get("Preferred-Value")})
+    return MappingProxyType(values)
+
+
+def folded(tags):
+    # registered subtags, or whole tags, by their lowercased form. Tags
+    # are ASCII, so lowercasing them is case folding them
+    return MappingProxyType({
+        intern(subtag.lower()): intern(subtag)
+        for subtag
+        in tags})
+
+
+class FoldedSubtags(dict):
+    # folded tables by name, so that a subtag in any case is found with a
+    # single lookup. Each table is folded the first time it is used
+
+    def __init__(self, bcp47):
+        super().__init__()
+        self.bcp47 = bcp47
+
+    def __missing__(self, table):
+        tags = self[table] = folded(self.bcp47[table])
+        return tags
+
+    def fold(self, tables):
+        # folds tables ahead of their first use, see BCP47.load
+        for table in tables:
+            self[table]
+        return self
+
+    def updated(self, bcp47, tables):
+        # a copy for bcp47 keeping the folded tables that are not in
+        # tables, see BCP47.apply
+        subtags = self.__class__(bcp47)
+        subtags.update(
+            (table, tags)
+            for table, tags
+            in self.items()
+            if table not in tables)
+        return subtags
+
+
+def prefixes(bcp47):
+    # allowed prefixes of extlangs, as languages, and of variants, as the
+    # registered prefix tags with the set of their subtags
+    return MappingProxyType(dict(
+        extlang=MappingProxyType({
+            subtag: frozenset(record["Prefix"])
+            for subtag, record
+            in bcp47["extlangs"].items()
+            if record.get("Prefix")}),
+        variant=MappingProxyType({
+            subtag: MappingProxyType({
+                prefix: frozenset(prefix.split("-"))
+                for prefix
+                in record["Prefix"]})
+            for subtag, record
+            in bcp47["variants"].items()
+            if record.get("Prefix")})))
+
+
+def fallback_chains(bcp47):
+    # memo of fallback chains by lang code, filled by BCP47Code.fallbacks
+    return {}
+
+
+def likely_subtag_parts(tag):
+    # (language, script, region) of a likely subtags key or value, with
+    # None for "und" or a missing part
+    language, script, region = None, None, None
+    subtags = re.split("[-_]", tag)
+    if subtags[0].lower() not in ("und", "root"):
+        language = subtags[0]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4:
+            script = subtag
+        elif len(subtag) == 2 or subtag.isdigit():
+            region = subtag
+    return language, script, region
+
+
+def likely_subtags(bcp47):
+    # likely (language, script, region) keyed by the subtags given. The
+    # registry only provides the script of languages with a
+    # Suppress-Script, a likely subtags file, as a flat json object or in
+    # the format of the CLDR json likelySubtags data, can add to these.
+    likely = {
+        (subtag, None, None): (subtag, record["Suppress-Script"], None)
+        for subtag, record
+        in bcp47["languages"].items()
+        if record.get("Suppress-Script")}
+    path = getattr(bcp47, "likely_subtags_file", None)
+    if path:
+        with open(path) as f:
+            data = json.load(f)
+        data = data.get("supplemental", {}).get("likelySubtags", data)
+        likely.update(
+            (likely_subtag_parts(k), likely_subtag_parts(v))
+            for k, v
+            in data.items())
+    return MappingProxyType(likely)
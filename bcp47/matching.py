@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# Matching of language ranges against a set of supported tags, as defined
+# by RFC 4647. The tags are compiled once into a trie of their lowercased
+# subtags, so that matching a range walks at most the depth of the range
+# rather than comparing it with every tag.
+
+from .code import BCP47Code
+
+
+class TrieNode(object):
+    __slots__ = ("children", "index", "indexes")
+
+    def __init__(self):
+        self.children = {}
+        # position of the tag ending at this node, if any
+        self.index = None
+        # positions of every tag in this subtree, in order
+        self.indexes = []
+
+
+class LanguageMatcher(object):
+
+    def __init__(self, bcp47, tags):
+        self.codes = []
+        self.root = TrieNode()
+        for tag in tags:
+            code = tag if isinstance(tag, BCP47Code) else bcp47(tag)
+            node = self.root
+            path = [node]
+            for subtag in code.lang_code.lower().split("-"):
+                node = node.children.setdefault(subtag, TrieNode())
+                path.append(node)
+            if node.index is not None:
+                continue
+            node.index = len(self.codes)
+            self.codes.append(code)
+            for parent in path:
+                parent.indexes.append(node.index)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def filter(self, ranges):
+        # basic filtering, RFC 4647 section 3.3.1. Returns the matching
+        # tags, those matching higher priority ranges first
+        return self._matches(ranges, self._basic)
+
+    def filter_extended(self, ranges):
+        # extended filtering, RFC 4647 section 3.3.2
+        return self._matches(ranges, self._extended)
+
+    def lookup(self, ranges, default=None):
+        # lookup, RFC 4647 section 3.4. Returns the tag best matching the
+        # highest priority range that matches any tag
+        for language_range in _ranges(ranges):
+            if language_range == "*":
+                continue
+            node = self.root
+            found = None
+            for subtag in language_range.split("-"):
+                node = node.children.get(subtag)
+                if node is None:
+                    break
+                # truncated ranges never end with a singleton
+                if node.index is not None and len(subtag) > 1:
+                    found = node.index
+            if found is not None:
+                return self.codes[found]
+        return default
+
+    def _matches(self, ranges, match):
+        seen = set()
+        matches = []
+        for language_range in _ranges(ranges):
+            indexes = sorted(set(match(language_range)) - seen)
+            seen.update(indexes)
+            matches.extend(self.codes[i] for i in indexes)
+        return matches
+
+    def _basic(self, language_range):
+        if language_range == "*":
+            return self.root.indexes
+        node = self.root
+        for subtag in language_range.split("-"):
+            node = node.children.get(subtag)
+            if node is None:
+                return []
+        return node.indexes
+
+    def _extended(self, language_range):
+        subtags = language_range.split("-")
+        matches = []
+        if subtags[0] == "*":
+            for child in self.root.children.values():
+                self._extended_match(child, subtags, 1, matches)
+        else:
+            child = self.root.children.get(subtags[0])
+            if child is not None:
+                self._extended_match(child, subtags, 1, matches)
+        return matches
+
+    def _extended_match(self, node, subtags, i, matches):
+        while i < len(subtags) and subtags[i] == "*":
+            i += 1
+        if i == len(subtags):
+            matches.extend(node.indexes)
+            return
+        subtag = subtags[i]
+        for key, child in node.children.items():
+            if key == subtag:
+                self._extended_match(child, subtags, i + 1, matches)
+            elif len(key) > 1:
+                # subtags other than singletons can be skipped
+                self._extended_match(child, subtags, i, matches)
+
+
+def _ranges(ranges):
+    # a single range, or an iterable of ranges or AcceptLanguage tuples
+    if isinstance(ranges, str):
+        ranges = (ranges, )
+    for language_range in ranges:
+        yield getattr(language_range, "lang_code", language_range).lower()
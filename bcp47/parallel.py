@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# Validation of large batches of tags across a pool of processes. The
+# registry is written once to a snapshot that every worker loads, rather
+# than each worker parsing the text registry.
+
+import itertools
+import multiprocessing
+import os
+import tempfile
+
+
+_worker = None
+
+
+def chunked(tags, chunk_size):
+    tags = iter(tags)
+    while True:
+        chunk = list(itertools.islice(tags, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker(bcp47_class, parser_class, src_file, snapshot_file, strict):
+    global _worker
+    _worker = bcp47_class(strict=strict, src_file=src_file)
+    _worker.parser_class = parser_class
+    _worker._parser = parser_class(src_file, snapshot_file)
+
+
+def validate_chunk(args):
+    tags, canonicalize = args
+    return list(_worker.validate_many(tags, canonicalize))
+
+
+def validate_parallel(bcp47, tags, canonicalize=False, processes=None,
+                      chunk_size=1000, ordered=True):
+    # yields a BCP47Result for each tag, in order unless ordered is False
+    # in which case each chunk of results is yielded as it completes
+    parser = bcp47._parser
+    if parser is None:
+        bcp47.parsed
+        parser = bcp47._parser
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapshot_file = parser.write_snapshot(
+            os.path.join(tmpdir, "iana-bcp47.snapshot"))
+        pool = multiprocessing.Pool(
+            processes,
+            initializer=init_worker,
+            initargs=(
+                bcp47.__class__, bcp47.parser_class, parser.src_file,
+                snapshot_file, bcp47.strict))
+        with pool:
+            chunks = (
+                (chunk, canonicalize)
+                for chunk
+                in chunked(tags, chunk_size))
+            results = (
+                pool.imap(validate_chunk, chunks)
+                if ordered
+                else pool.imap_unordered(validate_chunk, chunks))
+            for chunk in results:
+                yield from chunk
+
+
+def validate_file(bcp47, path, **kwargs):
+    # validates a file with one tag on each line, skipping blank lines
+    with open(path) as f:
+        yield from validate_parallel(
+            bcp47,
+            (tag for tag in (line.strip() for line in f) if tag),
+            **kwargs)
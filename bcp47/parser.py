@@ -1,36 +1,218 @@
 # -*- coding: utf-8 -*-
 
+import marshal
 import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from .records import make_record
+
+
+# bump this whenever the layout of the parsed registry changes
+SNAPSHOT_VERSION = 1
+
+
+class LazyParsed(Mapping):
+    # parsed records keyed by type, each type is parsed from its own
+    # section of the registry file the first time it is used
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.offsets = parser.offsets()
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, k):
+        items = self._parsed.get(k)
+        if items is None:
+            if k not in self.offsets:
+                raise KeyError(k)
+            with self._lock:
+                items = self._parsed.get(k)
+                if items is None:
+                    items = self._parsed[k] = self.parser.parse_type(
+                        k, self.offsets)
+        return items
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def loaded(self):
+        return tuple(self._parsed)
 
 
 class BCP47Parser(object):
     parsed = None
     bcp_filename = "iana-bcp47.txt"
+    snapshot_filename = "iana-bcp47.snapshot"
+    _src_file = None
+    _snapshot_file = None
 
-    def __init__(self):
+    def __init__(self, src_file=None, snapshot_file=None):
+        # src_file defaults to the registry bundled with the package, and
+        # snapshot_file to snapshot_filename next to it
+        self._src_file = src_file
+        self._snapshot_file = snapshot_file
         self.bcp = self.parse_bcp()
 
     @property
     def src_file(self):
+        if self._src_file is not None:
+            return self._src_file
         return os.path.join(
             os.path.dirname(__file__),
             self.bcp_filename)
 
+    @property
+    def snapshot_file(self):
+        if self._snapshot_file is not None:
+            return self._snapshot_file
+        if not self.snapshot_filename:
+            return
+        return os.path.join(
+            os.path.dirname(self.src_file),
+            self.snapshot_filename)
+
+    @property
+    def file_date(self):
+        with open(self.src_file) as f:
+            line = f.readline()
+        if line.startswith("File-Date: "):
+            return line.split(": ", 1)[1].strip()
+
+    @property
+    def snapshot_header(self):
+        return (SNAPSHOT_VERSION, marshal.version, self.file_date)
+
     def open(self):
         with open(self.src_file) as f:
-            for line in f.read().split("\n"):
-                yield line
+            for line in f:
+                yield line.rstrip("\n")
+
+    def load_snapshot(self):
+        # returns None if there is no usable snapshot for the current
+        # registry file, in which case the text file should be parsed
+        path = self.snapshot_file
+        if not path or not os.path.exists(path):
+            return
+        try:
+            # marshal.load reads the file piecemeal, loads is much faster
+            with open(path, "rb") as f:
+                header, parsed = marshal.loads(f.read())
+            if tuple(header) != self.snapshot_header:
+                return
+            return {
+                type_: [self.make_record(type_, item) for item in items]
+                for type_, items
+                in parsed.items()}
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            # unreadable, or not a snapshot of the parsed registry
+            return
+
+    def write_snapshot(self, path=None):
+        path = path or self.snapshot_file
+        tmp_path = "%s.%s.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(marshal.dumps(
+                (self.snapshot_header,
+                 {type_: [dict(record) for record in records]
+                  for type_, records
+                  in self.parsed.items()})))
+        os.replace(tmp_path, path)
+        return path
 
     def parse_bcp(self):
-        item = None
+        parsed = self.load_snapshot()
+        # without a snapshot, record types are parsed on first use
+        self.parsed = (
+            parsed
+            if parsed is not None
+            else LazyParsed(self))
+
+    def offsets(self):
+        # one pass over the lines of the registry recording the byte ranges
+        # of the records of each type, adjacent records of a type share a
+        # range
+        ranges = OrderedDict()
+        start = type_ = None
+        position = 0
+        with open(self.src_file, "rb") as f:
+            for line in f:
+                if line.startswith(b"%%"):
+                    self._add_range(ranges, type_, start, position)
+                    start, type_ = position, None
+                elif (type_ is None and start is not None
+                        and line.startswith(b"Type:")):
+                    type_ = line[5:].strip().decode("utf-8")
+                position += len(line)
+        self._add_range(ranges, type_, start, position)
+        return ranges
+
+    @staticmethod
+    def _add_range(ranges, type_, start, end):
+        if type_ is None:
+            return
+        runs = ranges.setdefault(type_, [])
+        if runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+
+    def parse_type(self, type_, offsets=None):
+        offsets = self.offsets() if offsets is None else offsets
+        items = []
+        with open(self.src_file, "rb") as f:
+            for start, end in offsets.get(type_, ()):
+                f.seek(start)
+                items.extend(
+                    item
+                    for _, item
+                    in self.records([type_], self._read_lines(f, end)))
+        return items
+
+    @staticmethod
+    def _read_lines(f, end):
+        # the lines of f from its current position up to the byte offset
+        # end, read one at a time rather than the whole range at once.
+        # The position is counted rather than asked of f.tell() per line
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode("utf-8").rstrip("\r\n")
+
+    def parse_src(self, types=None):
         items = {}
+        for type_, item in self.records(types):
+            items.setdefault(type_, []).append(item)
+        return items
+
+    def make_record(self, type_, item):
+        # the slotted record for a parsed dict, see records.py
+        return make_record(type_, item)
+
+    def records(self, types=None, lines=None):
+        # yields (type, record) pairs as each record is read from the
+        # file, records not in types are skipped without being built
+        item = None
+        type_ = None
         key = None
-        for line in self.open():
+        for line in (self.open() if lines is None else lines):
             # python needs switch!
             if line.startswith("%%"):
+                if item is not None and type_ is not None:
+                    yield type_, self.make_record(type_, item)
                 item = {}
+                type_ = None
                 continue
-            if line is None or item is None:
+            if item is None or not line:
                 continue
             parts = line.split(": ", 1)
             if len(parts) == 1:
@@ -43,11 +225,10 @@ class BCP47Parser(object):
             key = parts[0]
             value = parts[1]
             if key == "Type":
-                # create a key for this type if it
-                # doesnt exist
-                items[value] = items.get(value, [])
-                # add this item to the items/key
-                items[value].append(item)
+                if types is not None and value not in types:
+                    item = None
+                else:
+                    type_ = value
                 continue
             if key in ["Description", "Prefix"]:
                 # multi value
@@ -55,4 +236,5 @@ class BCP47Parser(object):
                 item[key].append(value)
                 continue
             item[key] = value
-        self.parsed = items
+        if item is not None and type_ is not None:
+            yield type_, self.make_record(type_, item)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# Queries of the registry tables by the values of their fields. An index
+# of each field queried is built once per registry load by the BCP47
+# instance, see BCP47.field_index, and the conditions of a query are
+# combined by intersecting the sets of subtags matching each of them.
+
+from bisect import bisect_left, bisect_right
+
+
+class FieldIndex(object):
+
+    def __init__(self, tags, field):
+        self.values = {}
+        if field is None:
+            # only which subtags are in the table
+            self.present = frozenset(tags)
+            self.ordered = []
+            return
+        for subtag, record in tags.items():
+            values = record.get(field)
+            if values is None:
+                continue
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            for value in values:
+                self.values.setdefault(value, set()).add(subtag)
+        self.values = {
+            value: frozenset(subtags)
+            for value, subtags
+            in self.values.items()}
+        self.present = frozenset().union(*self.values.values())
+        # values in order, with their subtags, for range queries
+        self.ordered = sorted(self.values)
+
+    def get(self, *values):
+        # subtags with any of the values, or with the field if no values
+        # are given
+        if not values:
+            return self.present
+        return frozenset().union(
+            *(self.values.get(value, ()) for value in values))
+
+    def between(self, start=None, end=None):
+        # subtags with a value from start to end inclusive
+        lo = 0 if start is None else bisect_left(self.ordered, start)
+        hi = (
+            len(self.ordered)
+            if end is None
+            else bisect_right(self.ordered, end))
+        return frozenset().union(
+            *(self.values[value] for value in self.ordered[lo:hi]))
+
+
+class Query(object):
+
+    def __init__(self, bcp47, table, subtags=None):
+        self.bcp47 = bcp47
+        self.table = table
+        self.subtags = (
+            bcp47.field_index(table, None).present
+            if subtags is None
+            else subtags)
+
+    def __contains__(self, subtag):
+        return subtag in self.subtags
+
+    def __iter__(self):
+        return iter(sorted(self.subtags))
+
+    def __len__(self):
+        return len(self.subtags)
+
+    def items(self):
+        tags = self.bcp47[self.table]
+        return [(subtag, tags[subtag]) for subtag in self]
+
+    def where(self, field, *values):
+        # records with any of the values, or with the field if no values
+        # are given
+        return self._filter(self._index(field).get(*values))
+
+    def exclude(self, field, *values):
+        return self.__class__(
+            self.bcp47,
+            self.table,
+            self.subtags - self._index(field).get(*values))
+
+    def between(self, field, start=None, end=None):
+        return self._filter(self._index(field).between(start, end))
+
+    def _filter(self, subtags):
+        return self.__class__(self.bcp47, self.table, self.subtags & subtags)
+
+    def _index(self, field):
+        return self.bcp47.field_index(self.table, field)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Registry records. Each record type has a slotted class with a slot for
+# each of the fields of that type, see RFC 5646 section 3.1. Values are
+# read as attributes, eg record.suppress_script, or by field name, eg
+# record["Suppress-Script"], as from the dicts records were parsed from.
+
+import datetime
+from collections.abc import Mapping
+from functools import lru_cache
+from sys import intern
+
+
+DATE_FIELDS = ("Added", "Deprecated")
+# free text fields, which are not worth interning
+TEXT_FIELDS = ("Description", "Comments")
+
+COMMON_FIELDS = (
+    "Subtag", "Description", "Added", "Deprecated", "Preferred-Value",
+    "Comments")
+TAG_FIELDS = ("Tag", ) + COMMON_FIELDS[1:]
+
+
+@lru_cache(maxsize=1024)
+def parse_date(value):
+    return datetime.date(*(int(part) for part in value.split("-")))
+
+
+def attribute_name(field):
+    return field.lower().replace("-", "_")
+
+
+class Record(Mapping):
+    __slots__ = ("_extra", )
+    fields = ()
+    _slots = {}
+    _setters = {}
+
+    def __init__(self, values):
+        # fields not known for the record type are kept in a dict
+        setters = self._setters
+        extra = None
+        for field, value in values.items():
+            if field in TEXT_FIELDS:
+                if isinstance(value, list):
+                    value = tuple(value)
+            elif isinstance(value, str):
+                value = intern(value)
+            else:
+                value = tuple(map(intern, value))
+            setter = setters.get(field)
+            if setter is not None:
+                setter(self, value)
+                continue
+            if extra is None:
+                extra = {}
+            extra[field] = value
+        self._extra = extra
+
+    def __getitem__(self, field):
+        slot = self._slots.get(field)
+        if slot is not None:
+            value = getattr(self, slot, None)
+            if value is not None:
+                return value
+        elif self._extra is not None and field in self._extra:
+            return self._extra[field]
+        raise KeyError(field)
+
+    def get(self, field, default=None):
+        # without raising and catching KeyError for missing fields, as
+        # Mapping.get does
+        slot = self._slots.get(field)
+        if slot is not None:
+            value = getattr(self, slot, None)
+            return default if value is None else value
+        if self._extra is not None:
+            return self._extra.get(field, default)
+        return default
+
+    def __contains__(self, field):
+        return self.get(field) is not None
+
+    def __eq__(self, other):
+        # records of the same type are compared slot by slot, rather
+        # than as dicts of their fields
+        if other.__class__ is not self.__class__:
+            return super().__eq__(other)
+        return self._extra == other._extra and all(
+            getattr(self, slot, None) == getattr(other, slot, None)
+            for slot
+            in self._slots.values())
+
+    __hash__ = None
+
+    def __iter__(self):
+        for field, slot in self._slots.items():
+            if getattr(self, slot, None) is not None:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self), ))
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, dict(self))
+
+
+def _value(slot):
+    return property(lambda self: getattr(self, slot, None))
+
+
+def _date(slot):
+
+    def date(self):
+        value = getattr(self, slot, None)
+        return None if value is None else parse_date(value)
+
+    return property(date)
+
+
+def record_class(name, fields):
+    slots = {field: "_%s" % attribute_name(field) for field in fields}
+    namespace = dict(
+        __slots__=tuple(slots.values()),
+        __module__=__name__,
+        fields=fields,
+        _slots=slots)
+    for field, slot in slots.items():
+        namespace[attribute_name(field)] = (
+            _date(slot)
+            if field in DATE_FIELDS
+            else _value(slot))
+    cls = type(name, (Record, ), namespace)
+    # the slot descriptors' setters, which are faster than setattr
+    cls._setters = {
+        field: getattr(cls, slot).__set__
+        for field, slot
+        in slots.items()}
+    return cls
+
+
+LanguageRecord = record_class(
+    "LanguageRecord",
+    COMMON_FIELDS + ("Suppress-Script", "Macrolanguage", "Scope"))
+ExtlangRecord = record_class(
+    "ExtlangRecord",
+    COMMON_FIELDS + ("Prefix", "Suppress-Script", "Macrolanguage", "Scope"))
+ScriptRecord = record_class("ScriptRecord", COMMON_FIELDS)
+RegionRecord = record_class("RegionRecord", COMMON_FIELDS)
+VariantRecord = record_class("VariantRecord", COMMON_FIELDS + ("Prefix", ))
+GrandfatheredRecord = record_class("GrandfatheredRecord", TAG_FIELDS)
+RedundantRecord = record_class("RedundantRecord", TAG_FIELDS)
+# records of types not known when this was written
+UnknownRecord = record_class(
+    "UnknownRecord",
+    ("Tag", ) + COMMON_FIELDS + (
+        "Prefix", "Suppress-Script", "Macrolanguage", "Scope"))
+
+RECORD_CLASSES = dict(
+    language=LanguageRecord,
+    extlang=ExtlangRecord,
+    script=ScriptRecord,
+    region=RegionRecord,
+    variant=VariantRecord,
+    grandfathered=GrandfatheredRecord,
+    redundant=RedundantRecord)
+
+
+def make_record(type_, values):
+    return RECORD_CLASSES.get(type_, UnknownRecord)(values)
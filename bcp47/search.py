@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Search of the registry records by their Description. The index is built
+# once per registry load by the BCP47 instance, see BCP47.search.
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+
+SearchResult = namedtuple("SearchResult", ["type", "subtag", "record"])
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    # case and accent folded text, so that "cote" finds "Côte"
+    return "".join(
+        c
+        for c
+        in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(c)).casefold()
+
+
+class DescriptionIndex(object):
+    # inverted index of the folded Description tokens of every record.
+    # Records are numbered in rank order, current records before
+    # deprecated ones and shorter descriptions first, so that ranking
+    # matches within a tier is sorting their numbers.
+
+    def __init__(self, bcp47):
+        records = []
+        for table, args in bcp47.mapping.items():
+            for subtag, record in bcp47[table].items():
+                records.append(SearchResult(args[0], subtag, record))
+        records.sort(key=lambda result: (
+            bool(result.record.get("Deprecated")),
+            len((result.record.get("Description") or [""])[0]),
+            result.subtag))
+        self.records = records
+        self.types = {}
+        self.descriptions = {}
+        self.exact = {}
+        postings, primary = set(), set()
+        for i, result in enumerate(records):
+            self.types.setdefault(result.type, set()).add(i)
+            descriptions = result.record.get("Description", ())
+            for n, description in enumerate(descriptions):
+                tokens = TOKEN_RE.findall(fold(description))
+                self.descriptions.setdefault(" ".join(tokens), set()).add(i)
+                for token in tokens:
+                    self.exact.setdefault(token, set()).add(i)
+                    postings.add((token, i))
+                    if not n:
+                        primary.add((token, i))
+        self.tokens, self.postings = self._sorted(postings)
+        self.primary_tokens, self.primary_postings = self._sorted(primary)
+
+    def __len__(self):
+        return len(self.records)
+
+    def prefixed(self, prefix, primary=False):
+        tokens, postings = (
+            (self.primary_tokens, self.primary_postings)
+            if primary
+            else (self.tokens, self.postings))
+        start = bisect_left(tokens, prefix)
+        end = bisect_left(tokens, prefix + "\U0010ffff", start)
+        return set(postings[start:end])
+
+    def _sorted(self, postings):
+        postings = sorted(postings)
+        return (
+            [token for token, _ in postings],
+            [i for _, i in postings])
+
+    def search(self, query, types=None, limit=20):
+        # records with a description containing a word starting with each
+        # word of the query. Records with a description matching the whole
+        # query come first, then those matching each word exactly, then
+        # those matching in their first description.
+        terms = TOKEN_RE.findall(fold(query))
+        if not terms:
+            return []
+        matches = self.prefixed(terms[0])
+        for term in terms[1:]:
+            if not matches:
+                break
+            matches &= self.prefixed(term)
+        if types is not None:
+            matches &= set().union(
+                *(self.types.get(type_, ()) for type_ in types))
+        whole = matches & self.descriptions.get(" ".join(terms), set())
+        exact = matches.intersection(
+            *(self.exact.get(term, ()) for term in terms))
+        exact -= whole
+        matches -= whole | exact
+        primary = matches.intersection(
+            *(self.prefixed(term, True) for term in terms))
+        matches -= primary
+        ranked = []
+        for tier in (whole, exact, primary, matches):
+            ranked.extend(sorted(tier))
+            if limit is not None and len(ranked) >= limit:
+                ranked = ranked[:limit]
+                break
+        return [self.records[i] for i in ranked]
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Per-request cost of parsing Accept-Language headers, with and without
+# the cache of parsed headers. Requests are drawn from a few thousand
+# distinct headers with a skewed distribution, as seen in real traffic.
+#
+#   python -m benchmarks.accept
+
+import random
+import timeit
+
+from bcp47 import BCP47
+
+
+LANGUAGES = (
+    "en", "en-US", "en-GB", "de", "de-DE", "de-CH", "fr", "fr-FR", "fr-CA",
+    "es", "es-419", "it", "nl", "pt-BR", "ja", "zh-Hans-CN", "zh-TW",
+    "ko", "ru", "sv")
+
+
+def headers(count, seed=0):
+    rand = random.Random(seed)
+    result = set()
+    while len(result) < count:
+        languages = rand.sample(LANGUAGES, rand.randint(1, 5))
+        result.add(", ".join(
+            [languages[0]]
+            + ["%s;q=0.%d" % (language, 9 - i)
+               for i, language
+               in enumerate(languages[1:])]
+            + (["*;q=0.1"] if rand.random() < .3 else [])))
+    return sorted(result)
+
+
+def requests(distinct, count, seed=0):
+    rand = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(distinct))]
+    return rand.choices(distinct, weights, k=count)
+
+
+def run(bcp, sample):
+    bcp.accept_language("en")
+    return timeit.timeit(
+        lambda: [bcp.accept_language(header) for header in sample],
+        number=1) / len(sample)
+
+
+def main():
+    sample = requests(headers(2000), 100000)
+    uncached = run(BCP47(accept_language_cache_size=0), sample)
+    cached = run(BCP47(), sample)
+    print("uncached: %6.2f us/request" % (uncached * 1e6))
+    print("cached:   %6.2f us/request" % (cached * 1e6))
+    print("speedup:  %6.1fx" % (uncached / cached))
+
+
+if __name__ == "__main__":
+    main()
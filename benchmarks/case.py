@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Validation of tags as they are found in the wild, in any case, compared
+# with fixing their case before validating them, as callers had to when
+# lookups were case sensitive, and with validating tags already in their
+# registered case.
+#
+#   python -m benchmarks.case
+
+import itertools
+import time
+
+from bcp47 import bcp47
+
+
+TAGS = (
+    "en-us", "EN-GB", "zh-hant-tw", "pt-br", "De-De", "es-419", "fr-CA",
+    "sr-latn-rs", "ZH-CN", "ja-jp", "en-US-u-CA-gregory", "nb-NO")
+
+
+def fix_case(tag):
+    # the usual caller side workaround, languages lowercase, scripts
+    # titlecase and regions uppercase
+    subtags = tag.split("-")
+    fixed = [subtags[0].lower()]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4 and subtag.isalpha():
+            fixed.append(subtag.title())
+        elif len(subtag) == 2 or subtag.isdigit():
+            fixed.append(subtag.upper())
+        else:
+            fixed.append(subtag.lower())
+    return "-".join(fixed)
+
+
+def validate(tags):
+    validate = bcp47.code_class.validate
+    return [validate(bcp47, tag) for tag in tags]
+
+
+def fixed(tags):
+    return validate(fix_case(tag) for tag in tags)
+
+
+def main(count=100000):
+    tags = list(itertools.islice(itertools.cycle(TAGS), count))
+    canonical = [result.lang_code for result in validate(TAGS)]
+    assert all(canonical), canonical
+    canonical = list(itertools.islice(itertools.cycle(canonical), count))
+    for name, run, run_tags in (
+            ("mixed case", validate, tags),
+            ("fixed case", fixed, tags),
+            ("canonical", validate, canonical)):
+        start = time.perf_counter()
+        run(run_tags)
+        elapsed = time.perf_counter() - start
+        print("%-12s %10.0f tags/s" % (name, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# Bringing a BCP47 instance up to a newer registry by applying the
+# changeset between the two, compared with loading the newer registry
+# with load. The newer registry is the bundled one with a few records
+# added, deprecated, changed and removed, as in a typical IANA update.
+#
+#   python -m benchmarks.changes
+
+import os
+import tempfile
+import time
+
+from bcp47 import BCP47, BCP47Parser
+
+
+def newer_registry(text):
+    text = text.replace(
+        text.split("\n", 1)[0], "File-Date: 2099-01-01", 1)
+    text = text.replace(
+        "%%\nType: region\nSubtag: AA\n",
+        "%%\nType: region\nSubtag: QN\nDescription: Test region\n"
+        "Added: 2099-01-01\n%%\nType: region\nSubtag: AA\n",
+        1)
+    text = text.replace(
+        "Description: Afar\nAdded: 2005-10-16\n",
+        "Description: Afar\nAdded: 2005-10-16\nDeprecated: 2099-01-01\n",
+        1)
+    text = text.replace(
+        "Description: Abkhazian\n", "Description: Abkhaz\n", 1)
+    start = text.rindex("%%", 0, text.index("Subtag: rozaj"))
+    return text[:start] + text[text.index("%%", start + 2):]
+
+
+def loaded(src_file):
+    bcp47 = BCP47(src_file=src_file)
+    for table in bcp47.mapping:
+        bcp47[table]
+    bcp47.preferred_values
+    bcp47.prefixes
+    bcp47.likely_subtags
+    bcp47.field_index("scripts", "Added")
+    bcp47("en-GB")
+    return bcp47
+
+
+def timed(run, runs=5):
+    best = None
+    for _ in range(runs):
+        elapsed = run()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        old = os.path.join(path, "old.txt")
+        new = os.path.join(path, "new.txt")
+        with open(BCP47Parser().src_file) as f:
+            text = f.read()
+        with open(old, "w") as f:
+            f.write(text)
+        with open(new, "w") as f:
+            f.write(newer_registry(text))
+
+        def load():
+            bcp47 = loaded(old)
+            start = time.perf_counter()
+            bcp47.load(new)
+            return time.perf_counter() - start
+
+        def diff():
+            bcp47 = loaded(old)
+            start = time.perf_counter()
+            bcp47.diff(new)
+            return time.perf_counter() - start
+
+        def apply():
+            bcp47 = loaded(old)
+            changeset = bcp47.diff(new)
+            start = time.perf_counter()
+            bcp47.apply(changeset)
+            return time.perf_counter() - start
+
+        print("changes: %d" % len(loaded(old).diff(new)))
+        for name, run in (("load", load), ("diff", diff), ("apply", apply)):
+            print("%-6s %8.1f ms" % (name, timed(run) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
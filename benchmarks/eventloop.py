@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Event loop latency while a cold instance loads the registry and
+# validates a batch of tags, with the sync API called from a coroutine
+# compared with aload and avalidate_many. A ticker task records how late
+# each of its 1ms sleeps wakes up.
+#
+#   python -m benchmarks.eventloop
+
+import asyncio
+import gc
+import time
+
+from bcp47 import BCP47, BCP47Parser
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+TAGS = [
+    "%s%s-%s-%s" % (a, b, script, region)
+    for a in LETTERS
+    for b in LETTERS
+    for script in ("Latn", "Cyrl", "Hant")
+    for region in ("GB", "US", "DE", "CH")]
+
+
+class Parser(BCP47Parser):
+    snapshot_filename = None
+
+
+async def ticker(lags):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def sync(bcp):
+    return list(bcp.validate_many(TAGS))
+
+
+async def run(validate):
+    bcp = BCP47()
+    bcp.parser_class = Parser
+    lags = []
+    task = asyncio.ensure_future(ticker(lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await validate(bcp)
+    elapsed = time.perf_counter() - start
+    # let the ticker record the wake up it was kept waiting for
+    await asyncio.sleep(0.01)
+    task.cancel()
+    return elapsed, max(lags)
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    for name, validate in (
+            ("sync:", sync),
+            ("async:", lambda bcp: bcp.avalidate_many(TAGS))):
+        # start each run without garbage left over from the last one
+        gc.collect()
+        elapsed, lag = loop.run_until_complete(run(validate))
+        print("%-7s %7.1f ms total %7.1f ms max loop lag"
+              % (name, elapsed * 1e3, lag * 1e3))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# Per-lookup cost of the fallback chain of a code, memoized per registry
+# load, compared with building the chain for every lookup.
+#
+#   python -m benchmarks.fallbacks
+
+import timeit
+
+from bcp47 import bcp47
+
+
+TAGS = ("sr-Latn-RS", "cmn-Hans-CN", "de-CH-1901", "en-GB", "pt-BR")
+
+
+def rebuilt(code):
+    bcp47.fallback_chains.clear()
+    return code.fallbacks()
+
+
+def run(fallbacks, number=2000):
+    codes = [bcp47(tag) for tag in TAGS]
+    return timeit.timeit(
+        lambda: [fallbacks(code) for code in codes],
+        number=number) / (number * len(TAGS))
+
+
+def main():
+    unmemoized = run(rebuilt, 200)
+    memoized = run(lambda code: code.fallbacks())
+    print("unmemoized: %6.2f us/lookup" % (unmemoized * 1e6))
+    print("memoized:   %6.2f us/lookup" % (memoized * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Cold-start cost of the first lookup in each table when record types
+# are parsed on demand, compared with parsing the whole registry up
+# front. Each run is a fresh interpreter without a snapshot.
+#
+#   python -m benchmarks.lazy
+
+import subprocess
+import sys
+
+
+LOAD = """
+import time
+start = time.perf_counter()
+from bcp47 import BCP47, BCP47Parser
+class Parser(BCP47Parser):
+    snapshot_filename = None
+    def parse_bcp(self):
+        if %r:
+            self.parsed = self.parse_src()
+        else:
+            super().parse_bcp()
+bcp47 = BCP47()
+bcp47.parser_class = Parser
+bcp47[%r]
+print(time.perf_counter() - start)
+"""
+
+TABLES = (
+    "languages", "extlangs", "scripts", "regions", "variants",
+    "grandfathereds", "redundants")
+
+
+def cold_start(table, eager, runs=5):
+    return min(
+        float(subprocess.check_output(
+            [sys.executable, "-c", LOAD % (eager, table)]).decode())
+        for _ in range(runs))
+
+
+def main():
+    print("%-15s %10s %10s" % ("table", "eager", "lazy"))
+    for table in TABLES:
+        print("%-15s %7.1f ms %7.1f ms"
+              % (table,
+                 cold_start(table, True) * 1e3,
+                 cold_start(table, False) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
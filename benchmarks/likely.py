@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+# Per-call cost of maximizing and minimizing codes, with and without the
+# cache of results.
+#
+#   python -m benchmarks.likely
+
+import timeit
+
+from bcp47 import BCP47
+
+
+TAGS = ("en", "en-GB", "de-CH-1901", "ru-RU", "he-IL", "fr-Latn-CA")
+
+
+def run(bcp, number=2000):
+    codes = [bcp(tag) for tag in TAGS]
+    return timeit.timeit(
+        lambda: [(code.maximize(), code.minimize()) for code in codes],
+        number=number) / (number * len(TAGS) * 2)
+
+
+def main():
+    uncached = run(BCP47(likely_subtags_cache_size=0))
+    cached = run(BCP47())
+    print("uncached: %6.2f us/call" % (uncached * 1e6))
+    print("cached:   %6.2f us/call" % (cached * 1e6))
+
+
+if __name__ == "__main__":
+    main()
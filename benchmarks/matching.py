@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Per-request cost of RFC 4647 basic filtering and lookup against
+# catalogs of 10 to 10000 supported tags, with a compiled matcher
+# compared with comparing each range with every tag.
+#
+#   python -m benchmarks.matching
+
+import itertools
+import random
+import timeit
+
+from bcp47 import bcp47
+
+
+REGIONS = ("US", "GB", "DE", "FR", "CH", "CN", "TW", "BR", "IN", "419")
+
+
+def catalog(size):
+    languages = [
+        subtag
+        for subtag, record in bcp47["languages"].items()
+        if len(subtag) == 2 and not record.get("Deprecated")]
+    tags = itertools.chain(
+        languages,
+        ("%s-%s" % (language, region)
+         for region in REGIONS
+         for language in languages),
+        ("%s-%s-%s" % (language, script, region)
+         for script in ("Latn", "Cyrl", "Arab", "Hant", "Hans")
+         for region in REGIONS
+         for language in languages))
+    return list(itertools.islice(tags, size))
+
+
+def naive_filter(tags, ranges):
+    lowered = [tag.lower() for tag in tags]
+    matches = []
+    for language_range in ranges:
+        language_range = language_range.lower()
+        for tag, lower in zip(tags, lowered):
+            if ((lower == language_range
+                 or lower.startswith(language_range + "-"))
+                    and tag not in matches):
+                matches.append(tag)
+    return matches
+
+
+def naive_lookup(tags, ranges):
+    lowered = {tag.lower(): tag for tag in tags}
+    for language_range in ranges:
+        subtags = language_range.lower().split("-")
+        while subtags:
+            tag = lowered.get("-".join(subtags))
+            if tag is not None:
+                return tag
+            subtags.pop()
+            if subtags and len(subtags[-1]) == 1:
+                subtags.pop()
+
+
+def requests(tags, count, seed=0):
+    rand = random.Random(seed)
+    return [
+        ["%s-XX" % rand.choice(tags), rand.choice(tags).split("-")[0], "en"]
+        for _ in range(count)]
+
+
+def per_request(match, sample):
+    return timeit.timeit(
+        lambda: [match(ranges) for ranges in sample],
+        number=1) / len(sample)
+
+
+def main():
+    print("%6s %12s %12s %12s %12s"
+          % ("tags", "naive filter", "filter", "naive lookup", "lookup"))
+    for size in (10, 100, 1000, 10000):
+        tags = catalog(size)
+        matcher = bcp47.matcher(tags)
+        sample = requests(tags, 1000)
+        for ranges in sample:
+            assert (
+                [str(code) for code in matcher.filter(ranges)]
+                == naive_filter(tags, ranges))
+            assert (
+                str(matcher.lookup(ranges))
+                == str(naive_lookup(tags, ranges)))
+        print("%6d %9.1f us %9.1f us %9.1f us %9.1f us"
+              % (size,
+                 per_request(
+                     lambda ranges: naive_filter(tags, ranges),
+                     sample) * 1e6,
+                 per_request(matcher.filter, sample) * 1e6,
+                 per_request(
+                     lambda ranges: naive_lookup(tags, ranges),
+                     sample) * 1e6,
+                 per_request(matcher.lookup, sample) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# Memory held by constructed codes, measured with tracemalloc, compared
+# with the previous layout of a per-instance __dict__ holding the bcp47
+# back-reference, a kwargs dict and the lang code.
+#
+#   python -m benchmarks.memory
+
+import gc
+import tracemalloc
+
+from bcp47 import bcp47
+
+
+TAGS = ("en-US", "en-GB", "de", "zh-Hant-TW", "sl-rozaj")
+
+
+class DictCode(object):
+
+    def __init__(self, code, tag):
+        # like the previous implementation, keep the parts split from the
+        # tag and the joined lang code
+        parts = tag.split("-")
+        self.bcp47 = code.bcp47
+        self.kwargs = dict(zip(code.kwargs, parts))
+        self._lang_code = "-".join(parts)
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    codes = [build(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del codes
+    return size / count
+
+
+def main(count=100000):
+    codes = [bcp47(tag) for tag in TAGS]
+    slotted = measure(
+        lambda i: bcp47(TAGS[i % len(TAGS)]), count)
+    dicts = measure(
+        lambda i: DictCode(codes[i % len(TAGS)], TAGS[i % len(TAGS)]),
+        count)
+    print("dict layout: %6.0f bytes/code" % dicts)
+    print("slotted:     %6.0f bytes/code" % slotted)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Throughput of validating a large batch of distinct tags across 1 to N
+# processes, compared with validate_many in a single process. The pool
+# start up, including each worker loading the registry snapshot, is
+# included in the timings.
+#
+#   python -m benchmarks.parallel [PROCESSES]
+
+import os
+import sys
+import time
+
+from bcp47 import BCP47
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+TAGS = [
+    "%s%s-%s-%s" % (a, b, script, region)
+    for a in LETTERS
+    for b in LETTERS
+    for script in ("Latn", "Cyrl", "Hant", "Arab")
+    for region in ("GB", "US", "DE", "CH", "FR", "419")]
+
+
+def timed(validate):
+    start = time.perf_counter()
+    count = sum(1 for _ in validate())
+    assert count == len(TAGS)
+    return time.perf_counter() - start
+
+
+def main(processes=None):
+    processes = processes or os.cpu_count()
+    bcp = BCP47()
+    bcp.parsed
+    sequential = timed(lambda: bcp.validate_many(TAGS))
+    print("%d tags" % len(TAGS))
+    print("validate_many:   %8.0f tags/s" % (len(TAGS) / sequential))
+    count = 1
+    while True:
+        elapsed = timed(
+            lambda: bcp.validate_parallel(TAGS, processes=count))
+        print("%2d processes:    %8.0f tags/s  %5.2fx"
+              % (count, len(TAGS) / elapsed, sequential / elapsed))
+        if count >= processes:
+            break
+        count = min(count * 2, processes)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# Time and peak memory of parsing the registry text file with the
+# streaming parser, compared with the previous parser that read the whole
+# file and split it into lines before building any records. The lazy
+# path, finding the byte ranges of each record type and parsing only the
+# languages from theirs, is measured the same way.
+#
+#   python -m benchmarks.parser
+
+import gc
+import timeit
+import tracemalloc
+
+from bcp47 import BCP47Parser
+
+
+class Parser(BCP47Parser):
+    snapshot_filename = None
+
+    def __init__(self):
+        pass
+
+
+class ReadParser(Parser):
+
+    def open(self):
+        with open(self.src_file) as f:
+            for line in f.read().split("\n"):
+                yield line
+
+
+def peak(parse):
+    gc.collect()
+    tracemalloc.start()
+    parse()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size
+
+
+def measure(name, parse, number=5):
+    best = min(timeit.repeat(parse, number=1, repeat=number))
+    print("%-20s %8.1f ms %8.1f MB peak"
+          % (name, best * 1e3, peak(parse) / 1e6))
+
+
+def main():
+    read, streaming = ReadParser(), Parser()
+    assert read.parse_src() == streaming.parse_src()
+    measure("read and split:", read.parse_src)
+    measure("streaming:", streaming.parse_src)
+    measure("streaming regions:", lambda: streaming.parse_src(["region"]))
+    measure("records, discarded:",
+            lambda: [None for record in streaming.records()])
+    offsets = streaming.offsets()
+    measure("lazy offsets:", streaming.offsets)
+    measure("lazy languages:",
+            lambda: streaming.parse_type("language", offsets))
+
+
+if __name__ == "__main__":
+    main()
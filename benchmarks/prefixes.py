@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+#
+# Cost of strict validation, which checks extlangs and variants against
+# their registered prefixes, compared with lenient validation, for each
+# tag. sl-IT-rozaj-biske has a region between the language and variants
+# of the prefix of biske, so has each subtag of its prefixes checked.
+#
+#   python -m benchmarks.prefixes
+
+import timeit
+
+from bcp47 import BCP47
+
+
+TAGS = (
+    "en-GB", "zh-yue-HK", "sl-rozaj-biske-1994", "de-CH-1901",
+    "zh-Latn-pinyin", "hy-Latn-IT-arevela", "en-fonipa",
+    "sl-IT-rozaj-biske")
+
+
+def run(bcp, tag, number=20000):
+    validate = bcp.code_class.validate
+    assert validate(bcp, tag).valid
+    return min(timeit.repeat(
+        lambda: validate(bcp, tag),
+        number=number,
+        repeat=5)) / number
+
+
+def main():
+    lenient, strict = BCP47(), BCP47(strict=True)
+    for tag in TAGS:
+        print("%-20s lenient: %6.2f us  strict: %6.2f us"
+              % (tag, run(lenient, tag) * 1e6, run(strict, tag) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# Per-query cost of selecting registry records by their fields with the
+# cached field indexes, compared with scanning every record.
+#
+#   python -m benchmarks.query
+
+import timeit
+
+from bcp47 import bcp47
+
+
+def scanned():
+    languages = bcp47["languages"]
+    return (
+        [k for k, r in languages.items() if r.get("Macrolanguage") == "zh"],
+        [k for k, r in languages.items() if r.get("Deprecated")],
+        [k for k, r in languages.items() if r["Added"] > "2009-07-29"],
+        [k for k, r in languages.items()
+         if r.get("Suppress-Script") == "Latn"
+         and not r.get("Deprecated")])
+
+
+def queried():
+    languages = bcp47.query("languages")
+    return (
+        languages.where("Macrolanguage", "zh"),
+        languages.where("Deprecated"),
+        languages.between("Added", "2009-07-30"),
+        languages.where("Suppress-Script", "Latn").exclude("Deprecated"))
+
+
+def main(number=100):
+    assert (
+        [sorted(result) for result in scanned()]
+        == [list(result) for result in queried()])
+    scan = timeit.timeit(scanned, number=number) / number
+    query = timeit.timeit(queried, number=number) / number
+    print("scan:    %8.1f us/4 queries" % (scan * 1e6))
+    print("indexed: %8.1f us/4 queries" % (query * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Memory held by the parsed registry, measured with tracemalloc, with
+# records as slotted objects compared with the previous plain dicts, and
+# the time taken to parse the registry as each.
+#
+#   python -m benchmarks.records
+
+import gc
+import time
+import tracemalloc
+
+from bcp47 import BCP47Parser
+
+
+class Parser(BCP47Parser):
+    snapshot_filename = None
+
+    def parse_bcp(self):
+        self.parsed = self.parse_src()
+
+
+class DictParser(Parser):
+
+    def make_record(self, type_, item):
+        return item
+
+
+def measure(parser_class):
+    gc.collect()
+    tracemalloc.start()
+    parser = parser_class()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = sum(len(records) for records in parser.parsed.values())
+    return size, count
+
+
+def timed(parser_class, runs=5):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        parser_class()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    for name, parser_class in (("dicts", DictParser), ("slotted", Parser)):
+        size, count = measure(parser_class)
+        print("%-8s %6.2f MB %5.0f bytes/record %6.1f ms parse"
+              % (name, size / 2 ** 20, size / count,
+                 timed(parser_class) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
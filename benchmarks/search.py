@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#
+# Per-query cost of searching the registry by description with the
+# description index, compared with scanning the descriptions of every
+# record, as done for each keystroke of an autocomplete.
+#
+#   python -m benchmarks.search
+
+import timeit
+
+from bcp47 import bcp47
+from bcp47.search import fold
+
+
+QUERIES = ("p", "Portug", "Portuguese", "Cyrillic", "cote", "sign lang")
+
+
+def scan(query):
+    terms = fold(query).split()
+    return [
+        (table, subtag)
+        for table in bcp47.mapping
+        for subtag, record in bcp47[table].items()
+        if any(
+            all(any(word.startswith(term)
+                    for word in fold(description).split())
+                for term in terms)
+            for description in record.get("Description", ()))]
+
+
+def per_query(search, number):
+    return timeit.timeit(
+        lambda: [search(query) for query in QUERIES],
+        number=number) / (number * len(QUERIES))
+
+
+def main():
+    build = timeit.timeit(lambda: bcp47.description_index, number=1)
+    print("index build: %8.1f ms" % (build * 1e3))
+    print("scan:        %8.1f us/query" % (per_query(scan, 1) * 1e6))
+    print("index:       %8.1f us/query"
+          % (per_query(bcp47.search, 1000) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# Cold-start cost of loading the registry from the text file, compared
+# with loading a precompiled binary snapshot. Each run is a fresh
+# interpreter.
+#
+#   python -m benchmarks.startup
+
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+
+LOAD = """
+import time
+start = time.perf_counter()
+from bcp47 import BCP47, BCP47Parser
+class Parser(BCP47Parser):
+    snapshot_filename = %r
+    @property
+    def snapshot_file(self):
+        return self.snapshot_filename
+bcp47 = BCP47()
+bcp47.parser_class = Parser
+bcp47["languages"]
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(snapshot, runs=5):
+    times = []
+    for _ in range(runs):
+        times.append(float(subprocess.check_output(
+            [sys.executable, "-c", LOAD % snapshot]).decode()))
+    return min(times)
+
+
+def interpreter(runs=5):
+    return min(timeit.repeat(
+        lambda: subprocess.check_call([sys.executable, "-c", "pass"]),
+        number=1, repeat=runs))
+
+
+def main():
+    from bcp47 import BCP47Parser
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapshot = os.path.join(tmpdir, "iana-bcp47.snapshot")
+        parser = BCP47Parser()
+        parser.parsed = parser.parse_src()
+        parser.write_snapshot(snapshot)
+        text = cold_start(None)
+        binary = cold_start(snapshot)
+    print("interpreter:   %8.1f ms" % (interpreter() * 1e3))
+    print("text parse:    %8.1f ms" % (text * 1e3))
+    print("snapshot load: %8.1f ms" % (binary * 1e3))
+    print("speedup:       %8.1fx" % (text / binary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# Per-tag validation cost with memoized subtag tables, compared with
+# rebuilding each table, and folding it, on every lookup.
+#
+#   python -m benchmarks.tables
+
+import timeit
+
+from bcp47 import BCP47
+
+
+TAGS = ("en", "en-GB", "de-DE", "zh-Hant-TW", "sl-rozaj")
+
+
+class UnmemoizedBCP47(BCP47):
+
+    def __getitem__(self, k):
+        return self._parsed_tags(*self.mapping[k])
+
+    @property
+    def folded_subtags(self):
+        # validation folds the tables it uses on each call without it
+        return None
+
+
+def run(bcp, number):
+    for tag in TAGS:
+        bcp(tag)
+    return timeit.timeit(
+        lambda: [bcp(tag) for tag in TAGS],
+        number=number) / (number * len(TAGS))
+
+
+def main():
+    unmemoized = run(UnmemoizedBCP47(), 20)
+    memoized = run(BCP47(), 2000)
+    print("unmemoized: %10.2f us/tag" % (unmemoized * 1e6))
+    print("memoized:   %10.2f us/tag" % (memoized * 1e6))
+    print("speedup:    %10.1fx" % (unmemoized / memoized))
+
+
+if __name__ == "__main__":
+    main()
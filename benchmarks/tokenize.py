@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+# Validation cost for valid, invalid, long-variant and extension tags,
+# compared with trying each remaining part type in turn for every subtag.
+#
+#   python -m benchmarks.tokenize
+
+import timeit
+
+from bcp47 import BCP47, BCP47Code
+
+
+INPUTS = dict(
+    valid=("en-GB", "zh-Hant-TW", "es-419", "zh-yue-HK"),
+    malformed=("en-NOTAREGION", "en-GB-Latn", "de-!!", "x"),
+    unrecognized=("en-QQQQ", "en-ZZ", "en-abcdefgh", "en-xxx"),
+    variants=("sl-rozaj-biske-1994", "de-CH-1901", "hy-Latn-IT-arevela"),
+    # extensions are not recognized by the trial validation
+    extensions=(
+        "en-US-u-ca-gregory", "de-DE-u-co-phonebk", "en-a-bbb-x-a-ccc",
+        "x-whatever"))
+
+
+class TrialCode(BCP47Code):
+    # validation as before the tokenizer: each subtag is looked up in the
+    # tables of each remaining part type until one matches
+    __slots__ = ()
+
+    @classmethod
+    def validate_tag(cls, bcp47, tag):
+        args = tag.split("-")
+        kwargs = {}
+        if not bcp47["languages"].get(args[0]):
+            return kwargs, "Language '%s' not recognized" % args[0]
+        kwargs["language"] = args[0]
+        tag_types = cls.tag_parts[1:5]
+        for part in args[1:]:
+            for i, part_type in enumerate(tag_types):
+                if bcp47["%ss" % part_type].get(part):
+                    kwargs[part_type] = part
+                    break
+            else:
+                return kwargs, "Unrecognized tag part '%s'" % part
+            tag_types = tag_types[i + (part_type != "variant"):]
+        return kwargs, None
+
+
+def run(bcp, tags, number=20000):
+    return timeit.timeit(
+        lambda: [bcp.code_class.validate(bcp, tag) for tag in tags],
+        number=number) / (number * len(tags))
+
+
+def main():
+    tokenized = BCP47()
+    trial = BCP47()
+    trial.code_class = TrialCode
+    for name, tags in INPUTS.items():
+        before = run(trial, tags)
+        after = run(tokenized, tags)
+        print(
+            "%-14s trial: %6.2f us/tag  tokenized: %6.2f us/tag"
+            % (name, before * 1e6, after * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Throughput of bcp47.validate_many, compared with constructing a code
+# for each tag and catching BCP47Exception, with and without the code
+# cache.
+#
+#   python -m benchmarks.validate
+
+import itertools
+import time
+
+from bcp47 import BCP47, BCP47Exception, bcp47
+
+
+TAGS = (
+    "en-US", "en-GB", "de", "fr-FR", "zh-Hant-TW", "pt-BR",
+    "en-NOTAREGION", "NOTALANGUAGE", "es-419", "sr-Latn-RS")
+
+
+cached_bcp47 = BCP47(cache_size=1024, cache_errors=True)
+
+
+def per_call(tags, bcp47=bcp47):
+    results = []
+    for tag in tags:
+        try:
+            results.append(str(bcp47(tag)))
+        except BCP47Exception as e:
+            results.append(e)
+    return results
+
+
+def cached(tags):
+    return per_call(tags, cached_bcp47)
+
+
+def batch(tags):
+    return list(bcp47.validate_many(tags))
+
+
+def canonical(tags):
+    return list(bcp47.canonicalize_many(tags))
+
+
+def main(count=100000):
+    tags = list(itertools.islice(itertools.cycle(TAGS), count))
+    bcp47["languages"]
+    for name, validate in (
+            ("per call", per_call),
+            ("cached", cached),
+            ("batch", batch),
+            ("canonical", canonical)):
+        start = time.perf_counter()
+        validate(tags)
+        elapsed = time.perf_counter() - start
+        print("%-10s %12.0f tags/s" % (name, count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from bcp47 import AcceptLanguage, BCP47
+from bcp47.accept import parse_accept_language, quality
+
+
+def test_quality():
+    assert quality([]) == 1.0
+    assert quality(["level=1"]) == 1.0
+    assert quality(["q=0.5"]) == 0.5
+    assert quality([" Q = 0.25 "]) == 0.25
+    assert quality(["q=0"]) == 0
+    assert quality(["q=1.5"]) is None
+    assert quality(["q=-1"]) is None
+    assert quality(["q=high"]) is None
+
+
+def test_parse_accept_language():
+    bcp = BCP47()
+    assert parse_accept_language(bcp, "") == ()
+    assert (
+        parse_accept_language(
+            bcp,
+            "de;q=0.7, fr-CH, *;q=0.5, fr;q=0.9, en;q=0.7, xx;q=0.9, "
+            "en-GB;q=0, es;q=bad,, iw")
+        == (AcceptLanguage("fr-CH", "fr-CH", 1.0),
+            AcceptLanguage("iw", "iw", 1.0),
+            AcceptLanguage("fr", "fr", 0.9),
+            AcceptLanguage("de", "de", 0.7),
+            AcceptLanguage("en", "en", 0.7),
+            AcceptLanguage("*", "*", 0.5)))
+    assert (
+        parse_accept_language(bcp, " en-GB\t;q=0.5")
+        == (AcceptLanguage("en-GB", "en-GB", 0.5), ))
+    assert parse_accept_language(bcp, "en-GB\n") == ()
+
+
+def test_accept_language_cache():
+    bcp = BCP47(accept_language_cache_size=2)
+    with patch('bcp47.parse_accept_language') as m:
+        m.side_effect = lambda bcp47, header: (header, )
+        assert bcp.accept_language("en") == ("en", )
+        assert bcp.accept_language("en") == ("en", )
+        assert bcp.accept_language("de") == ("de", )
+        assert bcp.accept_language("fr") == ("fr", )
+        assert m.call_count == 3
+        assert bcp.accept_language_cache.stats == dict(
+            hits=1, misses=3, evictions=1, size=2, maxsize=2)
+        bcp.reload()
+        assert len(bcp.accept_language_cache) == 0
+        bcp = BCP47(accept_language_cache_size=0)
+        assert bcp.accept_language_cache is None
+        assert bcp.accept_language("en") == ("en", )
+        assert bcp.accept_language("en") == ("en", )
+        assert m.call_count == 5
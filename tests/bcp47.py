@@ -1,8 +1,14 @@
 
-from collections import OrderedDict
+import asyncio
+import threading
+import time
+from types import MappingProxyType
 from unittest.mock import PropertyMock, patch
 
-from bcp47 import BCP47, BCP47Code, BCP47Parser
+import pytest
+
+from bcp47 import (
+    BCP47, BCP47Code, BCP47Exception, BCP47Parser, BCP47Result)
 
 
 class DummyParser(object):
@@ -63,7 +69,7 @@ def test_languages(m):
             dict(Subtag="baz", other="baz0")])
     bcp47 = BCP47()
     languages = bcp47["languages"]
-    assert isinstance(languages, OrderedDict)
+    assert isinstance(languages, MappingProxyType)
     assert list(languages.keys()) == ["foo", "bar", "baz"]
     assert list(languages.values()) == m.return_value["language"]
 
@@ -77,7 +83,7 @@ def test_extlangs(m):
             dict(Subtag="baz", other="baz0")])
     bcp47 = BCP47()
     extlangs = bcp47["extlangs"]
-    assert isinstance(extlangs, OrderedDict)
+    assert isinstance(extlangs, MappingProxyType)
     assert list(extlangs.keys()) == ["foo", "bar", "baz"]
     assert list(extlangs.values()) == m.return_value["extlang"]
 
@@ -91,7 +97,7 @@ def test_scripts(m):
             dict(Subtag="baz", other="baz0")])
     bcp47 = BCP47()
     scripts = bcp47["scripts"]
-    assert isinstance(scripts, OrderedDict)
+    assert isinstance(scripts, MappingProxyType)
     assert list(scripts.keys()) == ["foo", "bar", "baz"]
     assert list(scripts.values()) == m.return_value["script"]
 
@@ -105,7 +111,7 @@ def test_regions(m):
             dict(Subtag="baz", other="baz0")])
     bcp47 = BCP47()
     regions = bcp47["regions"]
-    assert isinstance(regions, OrderedDict)
+    assert isinstance(regions, MappingProxyType)
     assert list(regions.keys()) == ["foo", "bar", "baz"]
     assert list(regions.values()) == m.return_value["region"]
 
@@ -119,7 +125,7 @@ def test_variants(m):
             dict(Subtag="baz", other="baz0")])
     bcp47 = BCP47()
     variants = bcp47["variants"]
-    assert isinstance(variants, OrderedDict)
+    assert isinstance(variants, MappingProxyType)
     assert list(variants.keys()) == ["foo", "bar", "baz"]
     assert list(variants.values()) == m.return_value["variant"]
 
@@ -133,7 +139,7 @@ def test_grandfathereds(m):
             dict(Tag="baz", other="baz0")])
     bcp47 = BCP47()
     grandfathereds = bcp47["grandfathereds"]
-    assert isinstance(grandfathereds, OrderedDict)
+    assert isinstance(grandfathereds, MappingProxyType)
     assert list(grandfathereds.keys()) == ["foo", "bar", "baz"]
     assert list(grandfathereds.values()) == m.return_value["grandfathered"]
 
@@ -147,6 +153,500 @@ def test_redundants(m):
             dict(Tag="baz", other="baz0")])
     bcp47 = BCP47()
     redundants = bcp47["redundants"]
-    assert isinstance(redundants, OrderedDict)
+    assert isinstance(redundants, MappingProxyType)
     assert list(redundants.keys()) == ["foo", "bar", "baz"]
     assert list(redundants.values()) == m.return_value["redundant"]
+
+
+@patch('bcp47.BCP47.parsed', new_callable=PropertyMock)
+def test_tags_memoized(m):
+    m.return_value = dict(
+        region=[
+            dict(Subtag="foo", other="foo0"),
+            dict(Subtag="bar", other="bar0")])
+    bcp47 = BCP47()
+    regions = bcp47["regions"]
+    assert bcp47["regions"] is regions
+    assert m.call_count == 1
+    with pytest.raises(TypeError):
+        regions["baz"] = dict(Subtag="baz")
+
+
+@patch('bcp47.BCP47.parsed', new_callable=PropertyMock)
+def test_tags_reload(m):
+    m.return_value = dict(
+        region=[dict(Subtag="foo", other="foo0")])
+    bcp47 = BCP47()
+    bcp47._parser = DummyParser()
+    regions = bcp47["regions"]
+    bcp47.reload()
+    assert bcp47._parser is None
+    m.return_value = dict(
+        region=[dict(Subtag="bar", other="bar0")])
+    assert bcp47["regions"] is not regions
+    assert list(bcp47["regions"].keys()) == ["bar"]
+
+
+@patch('bcp47.BCP47Code.validate')
+def test_validate_many(m):
+    m.side_effect = lambda bcp47, tag, canonicalize: "RESULT %s" % tag
+    bcp47 = BCP47()
+    results = bcp47.validate_many(["foo", "bar", "foo", "baz", "bar"])
+    assert not m.called
+    assert (
+        list(results)
+        == ["RESULT foo", "RESULT bar", "RESULT foo",
+            "RESULT baz", "RESULT bar"])
+    assert (
+        list(list(c) for c in m.call_args_list)
+        == [[(bcp47, "foo", False), {}],
+            [(bcp47, "bar", False), {}],
+            [(bcp47, "baz", False), {}]])
+
+
+@patch('bcp47.BCP47Code.validate')
+def test_validate_many_dedupe_size(m):
+    m.side_effect = lambda bcp47, tag, canonicalize: "RESULT %s" % tag
+    bcp47 = BCP47()
+    results = bcp47.validate_many(
+        ["foo", "bar", "foo", "baz", "foo", "baz"], dedupe_size=2)
+    assert (
+        list(results)
+        == ["RESULT foo", "RESULT bar", "RESULT foo",
+            "RESULT baz", "RESULT foo", "RESULT baz"])
+    assert (
+        [c[0][1] for c in m.call_args_list]
+        == ["foo", "bar", "baz", "foo"])
+
+
+@patch('bcp47.BCP47Code.validate')
+def test_canonicalize_many(m):
+    m.side_effect = lambda bcp47, tag, canonicalize: (tag, canonicalize)
+    bcp47 = BCP47()
+    assert (
+        list(bcp47.canonicalize_many(["foo", "foo", "bar"]))
+        == [("foo", True), ("foo", True), ("bar", True)])
+    assert m.call_count == 2
+
+
+@patch('bcp47.indexes.preferred_values')
+def test_preferred_values(m):
+    bcp47 = BCP47()
+    assert bcp47.preferred_values is m.return_value
+    assert bcp47.preferred_values is m.return_value
+    assert list(m.call_args) == [(bcp47, ), {}]
+    assert m.call_count == 1
+    bcp47.reload()
+    assert bcp47.preferred_values is m.return_value
+    assert m.call_count == 2
+
+
+@patch('bcp47.indexes.prefixes')
+def test_prefixes(m):
+    bcp47 = BCP47()
+    assert not bcp47.strict
+    assert BCP47(strict=True).strict
+    assert bcp47.prefixes is m.return_value
+    assert bcp47.prefixes is m.return_value
+    assert list(m.call_args) == [(bcp47, ), {}]
+    assert m.call_count == 1
+    bcp47.reload()
+    assert bcp47.prefixes is m.return_value
+    assert m.call_count == 2
+
+
+@patch('bcp47.indexes.likely_subtags')
+def test_likely_subtags(m):
+    bcp47 = BCP47(likely_subtags_file="LIKELY")
+    assert bcp47.likely_subtags_file == "LIKELY"
+    assert bcp47.likely_subtags is m.return_value
+    assert bcp47.likely_subtags is m.return_value
+    assert list(m.call_args) == [(bcp47, ), {}]
+    assert m.call_count == 1
+
+
+def test_cache():
+    bcp = BCP47()
+    assert bcp.cache is None
+    bcp = BCP47(cache_size=2)
+    assert bcp.cache.maxsize == 2
+    assert not bcp.cache_errors
+    code = bcp("en-GB")
+    assert bcp("en-GB") is code
+    assert bcp("en", "GB") is not code
+    assert bcp(language="en", region="GB") is not code
+    assert (
+        bcp.cache.stats
+        == dict(hits=1, misses=3, evictions=1, size=2, maxsize=2))
+    # unhashable args are not cached
+    bcp.code_class = DummyCode
+    assert bcp(["en"]).args == (["en"], )
+    assert len(bcp.cache) == 2
+    bcp.code_class = BCP47Code
+    bcp.reload()
+    assert len(bcp.cache) == 0
+    assert bcp("en-GB") is not code
+
+
+def test_cache_errors():
+    bcp = BCP47(cache_size=10)
+    for _ in range(2):
+        with pytest.raises(BCP47Exception):
+            bcp("en-NOTAREGION")
+    assert len(bcp.cache) == 0
+    bcp = BCP47(cache_size=10, cache_errors=True)
+    for _ in range(2):
+        with pytest.raises(BCP47Exception) as e:
+            bcp("en-NOTAREGION")
+        assert e.value.args[0] == "Unrecognized tag part 'NOTAREGION'"
+    assert bcp.cache.hits == 1
+    assert len(bcp.cache) == 1
+
+
+registry = """File-Date: %s
+%%%%
+Type: language
+Subtag: en
+Description: English
+Added: 2005-10-16
+%%%%
+Type: language
+Subtag: iw
+Description: Hebrew
+Added: 2005-10-16
+Preferred-Value: he
+%%%%
+Type: extlang
+Subtag: yue
+Description: Yue Chinese
+Added: 2009-07-29
+Prefix: zh
+%%%%
+Type: script
+Subtag: Latn
+Description: Latin
+Added: 2005-10-16
+%%%%
+Type: region
+Subtag: GB
+Description: United Kingdom
+Added: 2005-10-16
+%%%%
+Type: grandfathered
+Tag: i-ami
+Description: Amis
+Added: 1999-05-25
+Preferred-Value: ami
+%%%%
+Type: variant
+Subtag: fonipa
+Description: International Phonetic Alphabet
+Added: 2006-12-11
+%%%%
+Type: redundant
+Tag: en-GB-oed
+Description: English, Oxford English Dictionary spelling
+Added: 2003-07-09
+%s"""
+
+extra_region = """%%
+Type: region
+Subtag: QM
+Description: Private use
+Added: 2005-10-16
+"""
+
+
+def _validate(bcp, tag):
+    return BCP47Code.validate(bcp, tag)
+
+
+def _registry(path, name, file_date="2019-09-16", extra=""):
+    src = path.joinpath(name)
+    src.write_text(registry % (file_date, extra))
+    return str(src)
+
+
+def test_load(tmp_path):
+    old = _registry(tmp_path, "old.txt")
+    new = _registry(tmp_path, "new.txt", "2020-01-01", extra_region)
+    bcp = BCP47(src_file=old)
+    assert bcp.src_file == old
+    assert not _validate(bcp, "en-QM").valid
+    assert "QM" not in bcp["regions"]
+    old_regions = bcp["regions"]
+    assert bcp.load(new)
+    assert bcp.src_file == new
+    assert _validate(bcp, "en-QM").valid
+    assert "QM" in bcp["regions"]
+    assert "QM" not in old_regions
+    # every table of the new registry is built and folded before it is
+    # swapped in
+    assert set(bcp._tags) == set(bcp.mapping)
+    assert set(bcp.folded_subtags) == set(bcp.mapping)
+    bcp.reload()
+    assert bcp.src_file == new
+    assert "QM" in bcp["regions"]
+
+
+def test_load_if_newer(tmp_path):
+    bcp = BCP47(src_file=_registry(tmp_path, "current.txt"))
+    assert bcp.load(if_newer=True)
+    regions = bcp["regions"]
+    assert not bcp.load(_registry(tmp_path, "same.txt"), if_newer=True)
+    assert not bcp.load(
+        _registry(tmp_path, "older.txt", "2018-01-01", extra_region),
+        if_newer=True)
+    assert bcp["regions"] is regions
+    assert bcp.src_file.endswith("current.txt")
+    assert bcp.load(
+        _registry(tmp_path, "newer.txt", "2020-01-01", extra_region),
+        if_newer=True)
+    assert "QM" in bcp["regions"]
+
+
+def test_load_indexes_and_cache(tmp_path):
+    bcp = BCP47(
+        cache_size=10, src_file=_registry(tmp_path, "old.txt"))
+    code = bcp("en-GB")
+    preferred_values = bcp.preferred_values
+    assert preferred_values["language"] == dict(iw="he")
+    bcp.load(_registry(tmp_path, "new.txt", extra=extra_region))
+    # indexes in use are rebuilt with the new registry
+    assert "preferred_values" in bcp._indexes
+    assert "prefixes" not in bcp._indexes
+    assert bcp.preferred_values is not preferred_values
+    assert bcp.preferred_values == preferred_values
+    assert len(bcp.cache) == 0
+    assert bcp("en-GB") is not code
+
+
+def test_load_background(tmp_path):
+    bcp = BCP47(src_file=_registry(tmp_path, "old.txt"))
+    assert not _validate(bcp, "en-QM").valid
+    thread = bcp.load_background(
+        _registry(tmp_path, "new.txt", "2020-01-01", extra_region),
+        if_newer=True)
+    thread.join()
+    assert _validate(bcp, "en-QM").valid
+
+
+def test_load_concurrent(tmp_path):
+    registries = (
+        _registry(tmp_path, "old.txt"),
+        _registry(tmp_path, "new.txt", "2020-01-01", extra_region))
+    bcp = BCP47(strict=True, src_file=registries[0])
+    errors = []
+    stop = threading.Event()
+    unrecognized = BCP47Result("en-QM", None, "Unrecognized tag part 'QM'")
+
+    def validate():
+        try:
+            while not stop.is_set():
+                for result in bcp.canonicalize_many(
+                        ["en-GB", "iw-GB", "i-ami", "en-QM"]):
+                    if result.tag == "en-QM":
+                        assert result.lang_code in ("en-QM", None)
+                        if result.lang_code is None:
+                            assert result == unrecognized
+                    else:
+                        assert result.valid
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=validate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(20):
+            assert bcp.load(registries[i % 2])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert _validate(bcp, "en-QM").valid
+
+
+def test_parsed_concurrent(tmp_path):
+    parsers = []
+    parsed_types = []
+
+    class SlowParser(BCP47Parser):
+
+        def __init__(self, src_file=None):
+            parsers.append(self)
+            time.sleep(0.05)
+            super().__init__(src_file)
+
+        def parse_type(self, type_, offsets=None):
+            parsed_types.append(type_)
+            time.sleep(0.01)
+            return super().parse_type(type_, offsets)
+
+    bcp = BCP47(src_file=_registry(tmp_path, "registry.txt"))
+    bcp.parser_class = SlowParser
+    barrier = threading.Barrier(32)
+    results = []
+
+    def validate():
+        barrier.wait()
+        results.append(tuple(bcp.validate_many(["en-GB", "iw", "en-QM"])))
+
+    threads = [threading.Thread(target=validate) for _ in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(parsers) == 1
+    assert len(parsed_types) == len(set(parsed_types))
+    assert len(results) == 32
+    assert len(set(results)) == 1
+    assert [result.valid for result in results[0]] == [True, True, False]
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_aload(tmp_path):
+    bcp = BCP47()
+    threads = []
+
+    def load(src_file, if_newer):
+        threads.append(threading.current_thread())
+        return (src_file, if_newer)
+
+    bcp.load = load
+    assert _run(bcp.aload("SRC", True)) == ("SRC", True)
+    assert threads[0] is not threading.current_thread()
+
+
+def test_avalidate_many(tmp_path):
+    bcp = BCP47(src_file=_registry(tmp_path, "registry.txt"))
+    tags = ["en-GB", "iw-GB", "en-QM"] * 5
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(len(ticks))
+            await asyncio.sleep(0)
+
+    async def validate():
+        ticker = asyncio.ensure_future(tick())
+        try:
+            return await bcp.avalidate_many(
+                tags, canonicalize=True, chunk_size=4)
+        finally:
+            ticker.cancel()
+
+    assert bcp._parser is None
+    results = _run(validate())
+    assert bcp._parser is not None
+    assert results == list(bcp.canonicalize_many(tags))
+    # the loop ran other tasks while the registry loaded and between
+    # each chunk of tags
+    assert len(ticks) >= 4
+
+
+def test_diff_and_apply(tmp_path):
+    bcp = BCP47(cache_size=10, src_file=_registry(tmp_path, "old.txt"))
+    new = _registry(
+        tmp_path, "new.txt", "2020-01-01",
+        extra_region + "%%\nType: script\nSubtag: Cyrl\n"
+        "Description: Cyrillic\nAdded: 2005-10-16\n")
+    code = bcp("en-GB")
+    tables = {table: bcp[table] for table in ("languages", "regions")}
+    preferred_values = bcp.preferred_values
+    prefixes = bcp.prefixes
+    languages = bcp.field_index("languages", "Added")
+    scripts = bcp.field_index("scripts", "Added")
+    changeset = bcp.diff(new)
+    assert (
+        [(change.kind, change.type, change.key) for change in changeset]
+        == [("added", "script", "Cyrl"), ("added", "region", "QM")])
+    assert changeset.old_file_date == "2019-09-16"
+    assert changeset.new_file_date == "2020-01-01"
+    folded = bcp.folded_subtags
+    assert set(folded) == {"languages", "regions"}
+    assert bcp.apply(changeset) == {"regions", "scripts"}
+    # the tables in use, changed or not, are folded before the swap
+    assert bcp.folded_subtags is not folded
+    assert set(bcp.folded_subtags) == set(bcp._tags)
+    assert bcp.folded_subtags["languages"] is folded["languages"]
+    assert "QM" in bcp.folded_subtags["regions"].values()
+    assert bcp.src_file == new
+    assert bcp._parser.file_date == "2020-01-01"
+    assert bcp["languages"] is tables["languages"]
+    assert bcp["regions"] is not tables["regions"]
+    assert "QM" in bcp["regions"]
+    assert "QM" not in tables["regions"]
+    # tables not built before are built from the new registry
+    assert "Cyrl" in bcp["scripts"]
+    assert _validate(bcp, "en-Cyrl-QM").valid
+    # only the indexes built from changed tables are rebuilt
+    assert bcp.preferred_values is not preferred_values
+    assert bcp.preferred_values == preferred_values
+    assert bcp.prefixes is prefixes
+    assert bcp.field_index("languages", "Added") is languages
+    assert bcp.field_index("scripts", "Added") is not scripts
+    assert len(bcp.cache) == 0
+    assert bcp("en-GB") is not code
+    # the changeset only applies to the registry it was made from
+    with pytest.raises(BCP47Exception) as e:
+        bcp.apply(changeset)
+    assert (
+        e.value.args[0]
+        == "Changeset from registry '2019-09-16' does not apply to "
+        "registry '2020-01-01'")
+
+
+def test_apply_changed_registry(tmp_path):
+    bcp = BCP47(src_file=_registry(tmp_path, "old.txt"))
+    regions = bcp["regions"]
+    new = _registry(tmp_path, "new.txt", "2020-01-01", extra_region)
+    changeset = bcp.diff(new)
+    # the newer registry is replaced after the changeset is made
+    _registry(tmp_path, "new.txt", "2021-01-01", extra_region)
+    with pytest.raises(BCP47Exception) as e:
+        bcp.apply(changeset)
+    assert (
+        e.value.args[0]
+        == "Registry '%s' is '2021-01-01', not '2020-01-01' as when the "
+        "changeset was made" % new)
+    changeset.src_file = None
+    with pytest.raises(BCP47Exception) as e:
+        bcp.apply(changeset)
+    assert e.value.args[0] == "Changeset has no registry file to apply"
+    assert bcp["regions"] is regions
+    assert bcp._parser.file_date == "2019-09-16"
+
+
+def test_apply_matches_load(tmp_path):
+    old = _registry(tmp_path, "old.txt", extra=extra_region)
+    new = tmp_path.joinpath("new.txt")
+    # a deprecated language, a changed extlang and a removed variant
+    new.write_text(
+        (registry % ("2020-01-01", ""))
+        .replace("Hebrew\n", "Hebrew\nDeprecated: 2020-01-01\n")
+        .replace("Prefix: zh\n", "Prefix: zh\nPrefix: yue\n")
+        .replace("Subtag: fonipa\n", "Subtag: fonipb\n"))
+    applied = BCP47(src_file=old)
+    for table in applied.mapping:
+        applied[table]
+    applied.prefixes
+    changeset = applied.diff(str(new))
+    assert (
+        [(change.kind, change.type, change.key) for change in changeset]
+        == [("deprecated", "language", "iw"), ("changed", "extlang", "yue"),
+            ("removed", "region", "QM"), ("added", "variant", "fonipb"),
+            ("removed", "variant", "fonipa")])
+    applied.apply(changeset)
+    loaded = BCP47(src_file=str(new))
+    for table in applied.mapping:
+        assert dict(applied[table]) == dict(loaded[table])
+    assert applied.prefixes == loaded.prefixes
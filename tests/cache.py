@@ -0,0 +1,44 @@
+import threading
+
+from bcp47.cache import LRUCache
+
+
+def test_cache():
+    cache = LRUCache(2)
+    assert cache.get("foo") is None
+    assert cache.get("foo", "DEFAULT") == "DEFAULT"
+    cache.set("foo", "foo0")
+    cache.set("bar", "bar0")
+    assert "foo" in cache
+    assert len(cache) == 2
+    assert cache.get("foo") == "foo0"
+    # bar is now the least recently used
+    cache.set("baz", "baz0")
+    assert "bar" not in cache
+    assert cache.get("baz") == "baz0"
+    assert (
+        cache.stats
+        == dict(hits=2, misses=2, evictions=1, size=2, maxsize=2))
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.evictions == 1
+
+
+def test_cache_threads():
+    cache = LRUCache(10)
+
+    def worker(n):
+        for i in range(1000):
+            cache.set((n, i % 20), i)
+            cache.get((n, (i + 1) % 20))
+
+    threads = [
+        threading.Thread(target=worker, args=(n, ))
+        for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 10
+    assert cache.hits + cache.misses == 8000
+    assert cache.evictions == 8000 - 10
@@ -0,0 +1,80 @@
+import json
+
+from bcp47 import Change, Changeset
+from bcp47.changes import diff
+from bcp47.records import make_record
+
+
+class DummyParser(object):
+
+    def __init__(self, file_date, parsed, src_file=None):
+        self.file_date = file_date
+        self.src_file = src_file
+        self.parsed = {
+            type_: [make_record(type_, record) for record in records]
+            for type_, records
+            in parsed.items()}
+
+
+OLD = DummyParser("2019-09-16", dict(
+    language=[
+        {"Subtag": "aa", "Description": ["Afar"]},
+        {"Subtag": "ab", "Description": ["Abkhazian"]},
+        {"Subtag": "iw", "Description": ["Hebrew"]}],
+    region=[{"Subtag": "BU", "Description": ["Burma"]}],
+    redundant=[{"Tag": "sgn-BR", "Description": ["Brazilian"]}]))
+
+NEW = DummyParser("2020-01-01", dict(
+    language=[
+        {"Subtag": "aa", "Description": ["Afar"]},
+        {"Subtag": "ab", "Description": ["Abkhaz"]},
+        {"Subtag": "iw", "Description": ["Hebrew"],
+         "Deprecated": "2020-01-01"},
+        {"Subtag": "he", "Description": ["Hebrew"]}],
+    region=[]), "NEW PATH")
+
+
+def test_diff():
+    changeset = diff(OLD, NEW)
+    assert isinstance(changeset, Changeset)
+    assert (
+        [(change.kind, change.type, change.key) for change in changeset]
+        == [("changed", "language", "ab"),
+            ("deprecated", "language", "iw"),
+            ("added", "language", "he"),
+            ("removed", "region", "BU"),
+            ("removed", "redundant", "sgn-BR")])
+    change = changeset.changes[0]
+    assert isinstance(change, Change)
+    assert change.old["Description"] == ("Abkhazian", )
+    assert change.new["Description"] == ("Abkhaz", )
+    assert changeset.added[0].old is None
+    assert changeset.removed[0].new is None
+    assert (
+        [change.key for change in changeset.deprecated]
+        == ["iw"])
+    assert changeset.types == {"language", "region", "redundant"}
+    assert changeset.keys("language") == {"ab", "iw", "he"}
+    assert changeset.keys("script") == frozenset()
+    assert (changeset.old_file_date, changeset.new_file_date) == (
+        "2019-09-16", "2020-01-01")
+    assert changeset.src_file == "NEW PATH"
+    assert (
+        repr(changeset)
+        == "<bcp47.changes.Changeset '2019-09-16..2020-01-01' 5 changes />")
+    assert not diff(OLD, OLD)
+
+
+def test_changeset_as_dict():
+    changeset = diff(OLD, NEW)
+    data = json.loads(json.dumps(changeset.as_dict()))
+    assert data["old_file_date"] == "2019-09-16"
+    assert (
+        data["changes"][0]
+        == dict(
+            type="language", key="ab", kind="changed",
+            old={"Subtag": "ab", "Description": ["Abkhazian"]},
+            new={"Subtag": "ab", "Description": ["Abkhaz"]}))
+    loaded = Changeset.from_dict(data)
+    assert loaded.changes == changeset.changes
+    assert loaded.src_file == "NEW PATH"
@@ -1,9 +1,11 @@
 
+import copy
+import pickle
 from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
 
-from bcp47 import BCP47, BCP47Code, BCP47Exception
+from bcp47 import BCP47, BCP47Code, BCP47Exception, BCP47Result, bcp47
 
 
 def test_code_construct_args_and_kwargs():
@@ -85,7 +87,9 @@ def test_code_construct_from_kwargs(m_add, m):
             ['extlang', None],
             ['script', None],
             ['region', 'GB'],
-            ['variant', None]])
+            ['variant', None],
+            ['extension', None],
+            ['privateuse', None]])
     assert (
         code.kwargs
         == {'language': 'en', 'region': 'GB'})
@@ -97,20 +101,67 @@ def test_code_props(m):
     bcp = BCP47()
     code = BCP47Code(bcp)
     code._lang_code = "LANG CODE"
-    code.kwargs = {
+    code._set_kwargs({
         "grandfathered": "GRANDFATHERED",
         "language": "LANG",
         "extlang": "EXTLANG",
         "script": "SCRIPT",
         "region": "REGION",
-        "variant": "VARIANT"}
+        "variant": "VARIANT"})
     assert code.language == "LANG"
     assert code.extlang == "EXTLANG"
     assert code.script == "SCRIPT"
     assert code.region == "REGION"
     assert code.variant == "VARIANT"
+    assert code.variants == ("VARIANT", )
     assert code.lang_code == "LANG CODE"
     assert code.grandfathered == "GRANDFATHERED"
+    assert code.bcp47 is bcp
+
+
+@patch('bcp47.BCP47Code.construct')
+def test_code_immutable(m):
+    bcp = BCP47()
+    code = BCP47Code(bcp)
+    code._set_kwargs(dict(language="en"))
+    for attr in ["bcp47", "kwargs", "lang_code", "language", "other"]:
+        with pytest.raises(AttributeError):
+            setattr(code, attr, "VALUE")
+    with pytest.raises(AttributeError):
+        code._other = "VALUE"
+    code.kwargs["language"] = "de"
+    assert code.language == "en"
+    assert not hasattr(code, "__dict__")
+
+
+def test_code_pickle_and_copy():
+    bcp = BCP47()
+    code = bcp("zh-Hant-TW-x-priv")
+    copied = pickle.loads(pickle.dumps(code))
+    assert type(copied) is BCP47Code
+    assert copied == code
+    assert copied.kwargs == code.kwargs
+    # the code is rebuilt with the default instance
+    assert copied.bcp47 is bcp47
+    assert copy.copy(code) is code
+    assert copy.deepcopy([code])[0] is code
+
+
+def test_code_hash_compare():
+    bcp = BCP47()
+    code = bcp("en-GB")
+    assert code == bcp("en", "GB")
+    assert code == bcp(language="en", region="GB")
+    assert code != bcp("en")
+    assert code != "en-GB"
+    assert hash(code) == hash("en-GB")
+    assert {code: "VALUE"}[bcp("en-GB")] == "VALUE"
+    assert (
+        sorted([bcp("en-GB"), bcp("de"), bcp("en")])
+        == [bcp("de"), bcp("en"), bcp("en-GB")])
+    assert bcp("de") < code <= bcp("en-GB") < bcp("fr")
+    with pytest.raises(TypeError):
+        code < "en-GB"
 
 
 @patch('bcp47.BCP47Code.construct')
@@ -120,166 +171,27 @@ def test_add_part(m):
     m_parts = MagicMock()
     result = code._add_part(m_parts, "PART TYPE", None)
     assert result is None
-    assert not bcp.__getitem__.called
     assert not m_parts.append.called
 
-    bcp.__getitem__.return_value.__contains__.return_value = True
+    bcp.folded_subtags = {"PART TYPEs": {"name": "Name"}}
     result = code._add_part(m_parts, "PART TYPE", "NAME")
-    assert (
-        list(bcp.__getitem__.call_args)
-        == [('PART TYPEs',), {}])
-    assert(
-        list(bcp.__getitem__.return_value.__contains__)
-        == [])
+    # the registered form of the name is added
     assert (
         list(m_parts.append.call_args)
-        == [('NAME',), {}])
+        == [('Name',), {}])
 
     m_parts.reset_mock()
     bcp.reset_mock()
 
-    bcp.__getitem__.return_value.__contains__.return_value = False
+    bcp.folded_subtags = {"PART TYPEs": {}}
     with pytest.raises(BCP47Exception) as e:
         code._add_part(m_parts, "PART TYPE", "NAME")
     assert (
         e.value.args[0]
         == "Part type 'NAME' not recognized")
-    assert (
-        list(bcp.__getitem__.call_args)
-        == [('PART TYPEs',), {}])
-    assert(
-        list(bcp.__getitem__.return_value.__contains__)
-        == [])
     assert not m_parts.append.called
 
 
-@patch('bcp47.BCP47Code.construct')
-def test_add_prefix_language(m):
-    bcp = MagicMock()
-    bcp.__getitem__.return_value.get.return_value = "LANG"
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-    code._add_prefix(parts, ["lang", "region"])
-    assert len(bcp.__getitem__.call_args_list) == 1
-    assert (
-        list(bcp.__getitem__.call_args)
-        == [('languages',), {}])
-    assert (
-        list(bcp.__getitem__.return_value.get.call_args)
-        == [('lang',), {}])
-    assert (
-        list(parts.append.call_args)
-        == [('lang',), {}])
-    assert code.kwargs == {'language': 'lang'}
-
-
-@patch('bcp47.BCP47Code.construct')
-def test_add_prefix_grandfathered(m):
-    bcp = MagicMock()
-
-    def lookup(k):
-        if k == "languages":
-            return {}
-        return dict(gf="code")
-
-    bcp.__getitem__.side_effect = lookup
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-    code._add_prefix(parts, ["gf"])
-    assert len(bcp.__getitem__.call_args_list) == 2
-    assert (
-        list(bcp.__getitem__.call_args)
-        == [('grandfathereds',), {}])
-    assert (
-        list(parts.append.call_args)
-        == [('gf',), {}])
-    assert code.kwargs == {'grandfathered': 'gf'}
-
-
-@patch('bcp47.BCP47Code.construct')
-def test_add_prefix_nomatch(m):
-    bcp = MagicMock()
-    bcp.__getitem__.return_value = {}
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-
-    with pytest.raises(BCP47Exception) as e:
-        code._add_prefix(parts, ["NOMATCH"])
-    assert (
-        e.value.args[0]
-        == "Language 'NOMATCH' not recognized")
-    assert (
-        list(list(c) for c in bcp.__getitem__.call_args_list)
-        == [[('languages',), {}], [('grandfathereds',), {}]])
-    assert not parts.append.called
-    assert code.kwargs == {}
-
-
-@patch('bcp47.BCP47Code.construct')
-def test_add_prefix_grandfathered_args(m):
-    bcp = MagicMock()
-
-    def lookup(k):
-        if k == "languages":
-            return {}
-        return dict(gf="code")
-
-    bcp.__getitem__.side_effect = lookup
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-    with pytest.raises(BCP47Exception) as e:
-        code._add_prefix(parts, ["gf", "foo", "bar"])
-    assert (
-        e.value.args[0]
-        == ("Grandfathered tags cannot have further extensions "
-            "- found '['foo', 'bar']'"))
-    assert (
-        list(list(c) for c in bcp.__getitem__.call_args_list)
-        == [[('languages',), {}], [('grandfathereds',), {}]])
-    assert not parts.append.called
-    assert code.kwargs == {}
-
-
-@patch('bcp47.BCP47Code.construct')
-def test_maybe_add_part(m):
-    bcp = MagicMock()
-
-    def lookup(k):
-        if k == "foos":
-            return {}
-        return dict(PART="info")
-
-    bcp.__getitem__.side_effect = lookup
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-    tag_types = ["foo", "bar", "baz"]
-    result = code._maybe_add_part(parts, tag_types, "PART")
-    assert result == ('info', ['baz'])
-    assert (
-        list(list(c) for c in bcp.__getitem__.call_args_list)
-        == [[('foos',), {}], [('bars',), {}]])
-    assert code.kwargs == {'bar': 'PART'}
-    assert (
-        list(list(c) for c in parts.append.call_args_list)
-        == [[('PART',), {}]])
-
-
-@patch('bcp47.BCP47Code.construct')
-def test_maybe_dont_add_part(m):
-    bcp = MagicMock()
-    bcp.__getitem__.return_value = {}
-    code = BCP47Code(bcp)
-    parts = MagicMock()
-    tag_types = ["foo", "bar", "baz"]
-    result = code._maybe_add_part(parts, tag_types, "PART")
-    assert result == (None, [])
-    assert (
-        list(list(c) for c in bcp.__getitem__.call_args_list)
-        == [[('foos',), {}], [('bars',), {}], [('bazs',), {}]])
-    assert code.kwargs == {}
-    assert not parts.append.called
-
-
 @patch('bcp47.BCP47Code.construct')
 @patch('bcp47.BCP47Code._add_part')
 def test_code_construct_from_kwargs_gf_and_lang(m_add, m):
@@ -332,119 +244,435 @@ def test_code_construct_from_kwargs_grandfathered(m_add, m):
     assert code._lang_code == "some-gf"
 
 
-@patch('bcp47.BCP47Code.construct')
-@patch('bcp47.BCP47Code._add_prefix')
-@patch('bcp47.BCP47Code._maybe_add_part')
-def test_code_construct_from_args_language(m_add, m_prefix, m):
-    bcp = MagicMock()
-    m_prefix.side_effect = (
-        lambda parts, args: parts.append(args[0]))
-    code = BCP47Code(bcp)
-    code.construct_from_args("foo")
-    assert code._lang_code == "foo"
-    assert not m_add.called
+REGISTRY = dict(
+    languages=dict(LANG="info", gf="info"),
+    extlangs=dict(EXT="info"),
+    scripts=dict(SCRI="info"),
+    regions=dict(RE="info"),
+    variants=dict(VARIANT="info", OTHERVAR="info"),
+    grandfathereds={"gf-tag": "info"})
 
 
-@patch('bcp47.BCP47Code.construct')
-@patch('bcp47.BCP47Code._add_prefix')
-@patch('bcp47.BCP47Code._maybe_add_part')
-def test_code_construct_from_args_language_region(m_add, m_prefix, m):
-    bcp = MagicMock()
-    m_prefix.side_effect = (
-        lambda parts, args: parts.append(args[0]))
+def test_code_tokenize():
+    assert (
+        BCP47Code.tokenize("LANG")
+        == ((None, "LANG", None, None, None, None, None, None), None))
+    assert (
+        BCP47Code.tokenize("LANG-EXT-SCRI-RE-VARIANT-1994")
+        == ((None, "LANG", "EXT", "SCRI", "RE", "VARIANT-1994",
+             None, None),
+            None))
+    assert (
+        BCP47Code.tokenize("LANG-419")
+        == ((None, "LANG", None, None, "419", None, None, None), None))
 
-    def _maybe_add(parts, tag_types, part):
-        parts.append(part)
-        code.kwargs["region"] = part
-        return "region", ["variant"]
 
-    m_add.side_effect = _maybe_add
-    code = BCP47Code(bcp)
-    code.construct_from_args("LANG", "REGION")
-    assert code._lang_code == "LANG-REGION"
+def test_code_tokenize_malformed():
+    assert (
+        BCP47Code.tokenize("L")
+        == (None, "Language 'L' not recognized"))
+    assert (
+        BCP47Code.tokenize("LANG-SCRI-NOTAREGION")
+        == (None, "Unrecognized tag part 'NOTAREGION'"))
+    assert (
+        BCP47Code.tokenize("LANG-RE-SCRI")
+        == (None, "Unrecognized tag part 'SCRI'"))
+    assert (
+        BCP47Code.tokenize("LANG-RE-GB")
+        == (None, "Unrecognized tag part 'GB'"))
+    assert (
+        BCP47Code.tokenize("LANG-R!")
+        == (None, "Unrecognized tag part 'R!'"))
+    assert (
+        BCP47Code.tokenize("LANG-")
+        == (None, "Unrecognized tag part ''"))
+    assert (
+        BCP47Code.tokenize("LANG\n")
+        == (None, "Language 'LANG\n' not recognized"))
+    assert (
+        BCP47Code.tokenize("LANG-RE\n")
+        == (None, "Unrecognized tag part 'RE\n'"))
 
 
-@patch('bcp47.BCP47Code.construct')
-@patch('bcp47.BCP47Code._add_prefix')
-@patch('bcp47.BCP47Code._maybe_add_part')
-def test_code_construct_from_args_lang_script_varian(m_add, m_prefix, m):
+def test_code_tokenize_extensions():
+    assert (
+        BCP47Code.tokenize("LANG-RE-u-ca-gregory-t-xx-x-priv-a")
+        == ((None, "LANG", None, None, "RE", None,
+             "u-ca-gregory-t-xx", "x-priv-a"),
+            None))
+    assert (
+        BCP47Code.tokenize("x-priv-a")
+        == ((None, None, None, None, None, None, None, "x-priv-a"),
+            None))
+    assert (
+        BCP47Code.tokenize("LANG-X-priv")
+        == ((None, "LANG", None, None, None, None, None, "X-priv"),
+            None))
+
+
+def test_code_tokenize_extensions_malformed():
+    errors = (
+        ("LANG-u-ca-u-co", "Unrecognized tag part 'u'"),
+        ("LANG-U-ca-u-co", "Unrecognized tag part 'u'"),
+        ("LANG-u", "Unrecognized tag part 'u'"),
+        ("LANG-u-c", "Unrecognized tag part 'c'"),
+        ("LANG-u-toolongsubtag", "Unrecognized tag part 'toolongsubtag'"),
+        ("LANG-x", "Unrecognized tag part 'x'"),
+        ("LANG-x-toolongsubtag", "Unrecognized tag part 'toolongsubtag'"),
+        ("LANG-u-ca-SCRI-R!", "Unrecognized tag part 'R!'"),
+        ("x", "Language 'x' not recognized"),
+        ("x-priv\n", "Language 'x' not recognized"),
+        ("LANG-x-priv\n", "Unrecognized tag part 'priv\n'"),
+        ("LANG-u-ca\n", "Unrecognized tag part 'ca\n'"))
+    for tag, error in errors:
+        assert BCP47Code.tokenize(tag) == (None, error)
+
+
+def test_code_validate_tag():
+    assert (
+        BCP47Code.validate_tag(REGISTRY, "LANG-SCRI-VARIANT")
+        == ((None, "LANG", None, "SCRI", None, "VARIANT", None, None),
+            None))
+    assert (
+        BCP47Code.validate_tag(
+            REGISTRY, "LANG-EXT-RE-VARIANT-OTHERVAR")
+        == ((None, "LANG", "EXT", None, "RE", "VARIANT-OTHERVAR",
+             None, None),
+            None))
+    assert (
+        BCP47Code.validate_tag(REGISTRY, "gf-tag")
+        == (("gf-tag", None, None, None, None, None, None, None), None))
+
+
+@patch('bcp47.BCP47Code._registered_parts')
+def test_code_validate_tag_malformed(m):
     bcp = MagicMock()
-    m_prefix.side_effect = (
-        lambda parts, args: parts.append(args[0]))
+    bcp.folded_subtags = MagicMock()
+    bcp.folded_subtags.__getitem__.return_value = {}
+    assert (
+        BCP47Code.validate_tag(bcp, "LANG-NOTAREGION")
+        == (None, "Unrecognized tag part 'NOTAREGION'"))
+    # only the grandfathered tags are checked
+    assert (
+        list(list(c) for c in bcp.folded_subtags.__getitem__.call_args_list)
+        == [[('grandfathereds',), {}]])
+    assert not m.called
 
-    def _maybe_add(parts, tag_types, part):
-        parts.append(part)
-        return part, tag_types[tag_types.index(part.lower()) + 1:]
 
-    m_add.side_effect = _maybe_add
-    code = BCP47Code(bcp)
-    code.construct_from_args("LANG", "SCRIPT", "VARIANT")
-    assert code._lang_code == "LANG-SCRIPT-VARIANT"
+def test_code_validate_tag_unrecognized():
+    errors = (
+        ("NOTLANG-SCRI", "Language 'NOTLANG' not recognized"),
+        ("LANG-XXX", "Unrecognized tag part 'XXX'"),
+        ("LANG-XXXX", "Unrecognized tag part 'XXXX'"),
+        ("LANG-XX", "Unrecognized tag part 'XX'"),
+        ("LANG-SCRI-NOTVAR", "Unrecognized tag part 'NOTVAR'"),
+        ("LANG-VARIANT-VARIANT", "Unrecognized tag part 'VARIANT'"))
+    for tag, error in errors:
+        parts, _error = BCP47Code.validate_tag(REGISTRY, tag)
+        assert _error == error
+
+
+def test_code_validate():
     assert (
-        list(list(c) for c in m_add.call_args_list)
-        == [[(['LANG', 'SCRIPT', 'VARIANT'],
-              ('extlang', 'script', 'region', 'variant'),
-              'SCRIPT'), {}],
-            [(['LANG', 'SCRIPT', 'VARIANT'],
-              ('region', 'variant'),
-              'VARIANT'), {}]])
+        BCP47Code.validate(REGISTRY, "LANG-RE")
+        == BCP47Result("LANG-RE", "LANG-RE", None))
+    assert (
+        BCP47Code.validate(REGISTRY, "gf-tag")
+        == BCP47Result("gf-tag", "gf-tag", None))
+    result = BCP47Code.validate(REGISTRY, "LANG-XX")
+    assert (
+        result
+        == BCP47Result("LANG-XX", None, "Unrecognized tag part 'XX'"))
+    assert not result.valid
+    for tag in ("en\n", "en-GB\n", "x-foo\n"):
+        assert not BCP47Code.validate(BCP47(), tag).valid
 
 
 @patch('bcp47.BCP47Code.construct')
-@patch('bcp47.BCP47Code._add_prefix')
-@patch('bcp47.BCP47Code._maybe_add_part')
-def test_code_construct_from_args_lang_script_unrecog(m_add, m_prefix, m):
-    bcp = MagicMock()
-    m_prefix.side_effect = (
-        lambda parts, args: parts.append(args[0]))
+def test_code_construct_from_args(m):
+    code = BCP47Code(REGISTRY)
+    code.construct_from_args("LANG", "SCRI", "VARIANT")
+    assert code._lang_code == "LANG-SCRI-VARIANT"
+    assert (
+        code.kwargs
+        == dict(language="LANG", script="SCRI", variant="VARIANT"))
 
-    def _maybe_add(parts, tag_types, part):
-        if part.lower() not in tag_types:
-            return None, tag_types
-        parts.append(part)
-        return part, tag_types[tag_types.index(part.lower()) + 1:]
 
-    m_add.side_effect = _maybe_add
-    code = BCP47Code(bcp)
-    with pytest.raises(BCP47Exception) as e:
-        code.construct_from_args("LANG", "SCRIPT", "NOTRECOGNIZED")
+def test_code_variants():
+    bcp = BCP47()
+    code = bcp("sl-rozaj-biske-1994")
+    assert code.variant == "rozaj-biske-1994"
+    assert code.variants == ("rozaj", "biske", "1994")
+    assert bcp("sl").variants == ()
     assert (
-        e.value.args[0]
-        == "Unrecognized tag part 'NOTRECOGNIZED'")
+        bcp(language="sl", variant="rozaj-biske")
+        == bcp("sl-rozaj-biske"))
+    with pytest.raises(BCP47Exception) as e:
+        bcp(language="sl", variant="rozaj-NOTAVARIANT")
+    assert e.value.args[0] == "Variant 'NOTAVARIANT' not recognized"
+
+
+def test_code_extensions():
+    bcp = BCP47()
+    code = bcp("en-US-u-ca-gregory-co-phonebk-t-de-x-priv")
+    assert code.language == "en"
+    assert code.region == "US"
+    assert code.extension == "u-ca-gregory-co-phonebk-t-de"
+    assert code.extensions == {"u": "ca-gregory-co-phonebk", "t": "de"}
+    assert code.privateuse == "x-priv"
+    assert bcp("en").extensions == {}
+    assert bcp("en").privateuse is None
+    code = bcp("x-whatever")
+    assert code.language is None
+    assert code.privateuse == "x-whatever"
+    assert str(code) == "x-whatever"
+
+
+def test_code_extensions_kwargs():
+    bcp = BCP47()
     assert (
-        list(list(c) for c in m_add.call_args_list)
-        == [[(['LANG', 'SCRIPT'],
-              ('extlang', 'script', 'region', 'variant'),
-              'SCRIPT'), {}],
-            [(['LANG', 'SCRIPT'],
-              ('region', 'variant'),
-              'NOTRECOGNIZED'), {}]])
-    assert code._lang_code is None
+        bcp(language="en", extension="u-ca-gregory", privateuse="x-priv")
+        == bcp("en-u-ca-gregory-x-priv"))
+    assert bcp(privateuse="x-priv") == bcp("x-priv")
+    with pytest.raises(BCP47Exception) as e:
+        bcp(language="en", extension="u-ca-u-co")
+    assert e.value.args[0] == "Unrecognized tag part 'u'"
+    with pytest.raises(BCP47Exception) as e:
+        bcp(language="en", privateuse="priv")
+    assert e.value.args[0] == "Unrecognized tag part 'priv'"
+    with pytest.raises(BCP47Exception) as e:
+        bcp(language="en", privateuse="x-priv\n")
+    assert e.value.args[0] == "Unrecognized tag part 'x-priv\n'"
+    with pytest.raises(BCP47Exception) as e:
+        bcp(region="GB", privateuse="x-priv")
+    assert e.value.args[0].startswith("Please specify")
 
 
 @patch('bcp47.BCP47Code.construct')
-@patch('bcp47.BCP47Code._add_prefix')
-@patch('bcp47.BCP47Code._maybe_add_part')
-def test_code_construct_from_args_lang_variant_unrecog(m_add, m_prefix, m):
-    bcp = MagicMock()
-    m_prefix.side_effect = (
-        lambda parts, args: parts.append(args[0]))
+def test_code_construct_from_args_grandfathered(m):
+    code = BCP47Code(REGISTRY)
+    code.construct_from_args("gf", "tag")
+    assert code._lang_code == "gf-tag"
+    assert code.kwargs == dict(grandfathered="gf-tag")
 
-    def _maybe_add(parts, tag_types, part):
-        parts.append(part)
-        return part, tag_types[tag_types.index(part.lower()) + 1:]
 
-    m_add.side_effect = _maybe_add
-    code = BCP47Code(bcp)
+@patch('bcp47.BCP47Code.construct')
+def test_code_construct_from_args_unrecog(m):
+    code = BCP47Code(REGISTRY)
     with pytest.raises(BCP47Exception) as e:
-        code.construct_from_args(
-            "LANG", "VARIANT", "NOTRECOGNIZED")
+        code.construct_from_args("LANG", "SCRI", "NOTRECOGNIZED")
     assert (
         e.value.args[0]
         == "Unrecognized tag part 'NOTRECOGNIZED'")
-    assert (
-        list(list(c) for c in m_add.call_args_list)
-        == [[(['LANG', 'VARIANT'],
-              ('extlang', 'script', 'region', 'variant'),
-              'VARIANT'), {}]])
     assert code._lang_code is None
+    assert code.kwargs == {}
+
+
+def test_code_validate_bcp47():
+    bcp = BCP47()
+    assert (
+        BCP47Code.validate(bcp, "en-Latn-GB")
+        == BCP47Result("en-Latn-GB", "en-Latn-GB", None))
+    assert (
+        BCP47Code.validate(bcp, "en-NOTAREGION")
+        == BCP47Result(
+            "en-NOTAREGION", None,
+            "Unrecognized tag part 'NOTAREGION'"))
+    assert (
+        BCP47Code.validate(bcp, "NOTALANGUAGE")
+        == BCP47Result(
+            "NOTALANGUAGE", None,
+            "Language 'NOTALANGUAGE' not recognized"))
+
+
+def test_code_canonicalize():
+    bcp = BCP47()
+    canonical = (
+        ("zh-yue-HK", "yue-HK"),
+        ("i-klingon", "tlh"),
+        ("i-default", "i-default"),
+        ("iw-IL", "he-IL"),
+        ("en-BU", "en-MM"),
+        ("zh-cmn-Hans", "cmn-Hans"),
+        ("sgn-BR", "bzs"),
+        ("ja-Latn-hepburn-heploc", "ja-Latn-hepburn-alalc97"),
+        ("en-u-ca-gregory-A-bbb-x-priv", "en-a-bbb-u-ca-gregory-x-priv"),
+        ("x-priv", "x-priv"),
+        ("en-GB", "en-GB"))
+    for tag, expected in canonical:
+        code = bcp(tag).canonicalize()
+        assert isinstance(code, BCP47Code)
+        assert code.lang_code == expected
+        assert (
+            BCP47Code.validate(bcp, tag, True)
+            == BCP47Result(tag, expected, None))
+    assert (
+        BCP47Code.validate(bcp, "en-NOTAREGION", True)
+        == BCP47Result(
+            "en-NOTAREGION", None, "Unrecognized tag part 'NOTAREGION'"))
+
+
+def test_code_parts():
+    code = BCP47()("en-Latn-GB-x-priv")
+    assert (
+        code.parts
+        == (None, "en", None, "Latn", "GB", None, None, "x-priv"))
+
+
+def test_code_case():
+    bcp = BCP47()
+    # tags are matched case insensitively, and formatted in the case of
+    # their registered subtags
+    cases = (
+        ("EN-us", "en-US"),
+        ("ZH-hant-tw", "zh-Hant-TW"),
+        ("SL-Rozaj-BISKE", "sl-rozaj-biske"),
+        ("sgn-be-fr", "sgn-BE-FR"),
+        ("i-KLINGON", "i-klingon"),
+        ("EN-GB-OED", "en-GB-oed"),
+        ("en-U-CA-Gregory-X-Priv", "en-u-ca-gregory-x-priv"),
+        ("X-Whatever", "x-whatever"))
+    for tag, expected in cases:
+        code = bcp(tag)
+        assert code.lang_code == expected
+        assert code == bcp(expected)
+        assert (
+            BCP47Code.validate(bcp, tag)
+            == BCP47Result(tag, expected, None))
+    code = bcp("EN-latn-us")
+    assert (code.language, code.script, code.region) == ("en", "Latn", "US")
+    assert (
+        bcp(language="EN", script="latn", region="us").lang_code
+        == "en-Latn-US")
+    assert bcp("SGN-be-FR").canonicalize().lang_code == "sfb"
+    assert BCP47(strict=True)("SL-ROZAJ-BISKE").lang_code == "sl-rozaj-biske"
+    with pytest.raises(BCP47Exception) as e:
+        bcp("Notlang-US")
+    assert e.value.args[0] == "Language 'Notlang' not recognized"
+
+
+def test_code_strict():
+    lenient = BCP47()
+    strict = BCP47(strict=True)
+    errors = (
+        ("en-1994", "Variant '1994' not allowed with prefix 'en'"),
+        ("sl-biske", "Variant 'biske' not allowed with prefix 'sl'"),
+        ("en-yue", "Extlang 'yue' not allowed with prefix 'en'"),
+        ("de-1901-biske",
+         "Variant 'biske' not allowed with prefix 'de-1901'"),
+        ("sl-biske-rozaj",
+         "Variant 'biske' not allowed with prefix 'sl'"),
+        ("sl-1994", "Variant '1994' not allowed with prefix 'sl'"),
+        ("ja-Latn-heploc",
+         "Variant 'heploc' not allowed with prefix 'ja-Latn'"))
+    for tag, error in errors:
+        assert BCP47Code.validate(lenient, tag).valid
+        assert (
+            BCP47Code.validate(strict, tag)
+            == BCP47Result(tag, None, error))
+        with pytest.raises(BCP47Exception) as e:
+            strict(tag)
+        assert e.value.args[0] == error
+    for tag in ("sl-rozaj-biske", "sl-IT-rozaj-biske", "zh-yue-HK",
+                "de-CH-1901", "zh-Latn-pinyin", "en-fonipa", "en-GB-oed",
+                "sl-Latn-IT-rozaj-biske-1994", "sl-rozaj-1994",
+                "ja-Latn-hepburn-heploc", "ja-Latn-JP-hepburn-heploc"):
+        assert str(strict(tag)) == tag
+    with pytest.raises(BCP47Exception) as e:
+        strict(language="en", variant="1994")
+    assert e.value.args[0] == "Variant '1994' not allowed with prefix 'en'"
+    assert str(strict(language="sl", variant="rozaj-biske")) == (
+        "sl-rozaj-biske")
+
+
+LIKELY_SUBTAGS = """{"supplemental": {"likelySubtags": {
+    "zh": "zh-Hans-CN",
+    "zh-TW": "zh-Hant-TW",
+    "zh-Hant": "zh-Hant-TW",
+    "en": "en-Latn-US",
+    "sr": "sr-Cyrl-RS",
+    "sr-ME": "sr-Latn-ME",
+    "und-Cyrl": "ru-Cyrl-RU"}}}"""
+
+
+def test_code_likely_suppress_script():
+    bcp = BCP47()
+    for tag, maximized, minimized in (
+            ("en", "en-Latn", "en"),
+            ("en-GB", "en-Latn-GB", "en-GB"),
+            ("de-Latn-CH-1901", "de-Latn-CH-1901", "de-CH-1901"),
+            ("iw", "he-Hebr", "he"),
+            ("zh", "zh", "zh"),
+            ("i-klingon", "tlh", "tlh"),
+            ("x-foo", "x-foo", "x-foo")):
+        assert str(bcp(tag).maximize()) == maximized
+        assert str(bcp(tag).minimize()) == minimized
+
+
+def test_code_likely_subtags_file(tmp_path):
+    path = tmp_path.joinpath("likely.json")
+    path.write_text(LIKELY_SUBTAGS)
+    bcp = BCP47(likely_subtags_file=str(path))
+    for tag, maximized, minimized in (
+            ("zh", "zh-Hans-CN", "zh"),
+            ("zh-Hans-CN", "zh-Hans-CN", "zh"),
+            ("zh-TW", "zh-Hant-TW", "zh-TW"),
+            ("zh-Hant", "zh-Hant-TW", "zh-TW"),
+            ("zh-Hant-HK", "zh-Hant-HK", "zh-Hant-HK"),
+            ("en-US-x-foo", "en-Latn-US-x-foo", "en-x-foo"),
+            ("sr-ME", "sr-Latn-ME", "sr-ME"),
+            ("sr-Latn", "sr-Latn-RS", "sr-Latn"),
+            ("und-Cyrl", "ru-Cyrl-RU", "ru-RU")):
+        assert str(bcp(tag).maximize()) == maximized
+        assert str(bcp(tag).minimize()) == minimized
+
+
+def test_code_likely_cache():
+    bcp = BCP47(likely_subtags_cache_size=2)
+    code = bcp("en-GB").maximize()
+    assert bcp("en-GB").maximize() is code
+    assert bcp.likely_subtags_cache.stats == dict(
+        hits=1, misses=1, evictions=0, size=1, maxsize=2)
+    assert bcp("en-GB").minimize() is bcp("en-GB").minimize()
+    bcp.reload()
+    assert len(bcp.likely_subtags_cache) == 0
+    bcp = BCP47(likely_subtags_cache_size=0)
+    assert bcp.likely_subtags_cache is None
+    assert bcp("en-GB").maximize() is not bcp("en-GB").maximize()
+    assert bcp("en-GB").maximize() == bcp("en-GB").maximize()
+
+
+def test_code_fallbacks():
+    bcp = BCP47()
+    for tag, fallbacks in (
+            ("de-CH-1901", ["de-CH-1901", "de-CH", "de"]),
+            ("cmn-Hans-CN",
+             ["cmn-Hans-CN", "cmn-Hans", "cmn", "zh-Hans-CN", "zh-Hans",
+              "zh"]),
+            ("zh-yue-HK", ["yue-HK", "yue", "zh-HK", "zh"]),
+            ("en-a-bbb-x-foo", ["en-a-bbb-x-foo", "en-a-bbb", "en"]),
+            ("x-foo", ["x-foo"]),
+            ("i-default", ["i-default"]),
+            ("iw-IL", ["he-IL", "he"])):
+        assert [str(code) for code in bcp(tag).fallbacks()] == fallbacks
+    assert bcp("en-GB").fallbacks("DEFAULT") == (
+        bcp("en-GB"), bcp("en"), "DEFAULT")
+
+
+def test_code_fallbacks_memo():
+    bcp = BCP47()
+    chain = bcp("en-GB").fallbacks()
+    assert bcp.fallback_chains == {"en-GB": chain}
+    assert bcp("en-GB").fallbacks() is chain
+    bcp.reload()
+    assert bcp.fallback_chains == {}
+    assert bcp("en-GB").fallbacks() is not chain
+    assert bcp("en-GB").fallbacks() == chain
+
+
+def test_code_fallbacks_max(monkeypatch):
+    monkeypatch.setattr(BCP47Code, "max_fallback_chains", 1)
+    bcp = BCP47()
+    bcp("en-GB").fallbacks()
+    bcp("de-DE").fallbacks()
+    assert list(bcp.fallback_chains) == ["en-GB"]
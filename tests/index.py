@@ -0,0 +1,184 @@
+import mmap
+from functools import partial
+from unittest.mock import patch
+
+import pytest
+
+from bcp47 import BCP47, BCP47IndexParser, BCP47Parser
+from bcp47.index import IndexedTags
+
+
+markup = """File-Date: 2019-09-16
+%%
+Type: language
+Subtag: ab
+Description: Abkhazian
+Added: 2005-10-16
+Suppress-Script: Cyrl
+%%
+Type: language
+Subtag: aa
+Description: Afar
+Added: 2005-10-16
+%%
+Type: region
+Subtag: GB
+Description: United Kingdom
+Added: 2005-10-16
+%%
+Type: grandfathered
+Tag: i-ami
+Description: Amis
+Added: 1999-05-25
+"""
+
+
+def _parser_class(path):
+
+    class TmpIndexParser(BCP47IndexParser):
+
+        @property
+        def src_file(self):
+            return str(path.joinpath("registry.txt"))
+
+    return TmpIndexParser
+
+
+@pytest.fixture
+def registry(tmp_path):
+    tmp_path.joinpath("registry.txt").write_text(markup)
+    return tmp_path
+
+
+def test_index_parser_builds_index(registry):
+    parser = _parser_class(registry)()
+    assert (
+        parser.index_file
+        == str(registry.joinpath(parser.index_filename)))
+    assert registry.joinpath(parser.index_filename).exists()
+    assert sorted(parser.parsed) == ["grandfathered", "language", "region"]
+    assert (
+        list(parser.parsed["language"])
+        == [{'Subtag': 'aa', 'Description': ('Afar', ),
+             'Added': '2005-10-16'},
+            {'Subtag': 'ab', 'Description': ('Abkhazian', ),
+             'Added': '2005-10-16', 'Suppress-Script': 'Cyrl'}])
+
+
+def test_index_parser_reuses_index(registry):
+    _parser_class(registry)()
+    with patch('bcp47.BCP47Parser.parse_bcp') as m:
+        parser = _parser_class(registry)()
+    assert not m.called
+    assert list(parser.tags("region")) == ["GB"]
+
+
+def test_index_parser_snapshot(registry):
+    parser = _parser_class(registry)()
+    path = str(registry.joinpath("snapshot"))
+    assert parser.write_snapshot(path) == path
+    snapshot = BCP47Parser(
+        str(registry.joinpath("registry.txt")), path).load_snapshot()
+    assert snapshot == {
+        type_: list(records)
+        for type_, records
+        in parser.parsed.items()}
+
+
+def test_index_parser_stale_index(registry):
+    parser = _parser_class(registry)()
+    registry.joinpath("registry.txt").write_text(
+        markup.replace("2019-09-16", "2020-01-01"))
+    assert not parser.load_index()
+    with patch('bcp47.BCP47IndexParser.write_index') as m:
+        with pytest.raises(OSError):
+            _parser_class(registry)()
+    assert m.called
+    assert _parser_class(registry)().load_index()
+
+
+def test_index_parser_corrupt_index(registry):
+    parser = _parser_class(registry)()
+    registry.joinpath(parser.index_filename).write_bytes(b"")
+    assert not parser.load_index()
+    registry.joinpath(parser.index_filename).write_bytes(b"\x00" * 32)
+    assert not parser.load_index()
+
+
+def test_index_parser_truncated_index(registry):
+    parser = _parser_class(registry)()
+    path = registry.joinpath(parser.index_filename)
+    data = path.read_bytes()
+    opened = []
+    mmap_class = mmap.mmap
+
+    def mmap_(*args, **kwargs):
+        opened.append(mmap_class(*args, **kwargs))
+        return opened[-1]
+
+    with patch('bcp47.index.mmap.mmap', mmap_):
+        for size in (8, 30, 60):
+            path.write_bytes(data[:size])
+            assert not parser.load_index()
+        path.write_bytes(data.replace(b"2019-09-16", b"2020-01-01"))
+        assert not parser.load_index()
+    assert len(opened) == 4
+    assert all(index.closed for index in opened)
+
+
+def test_index_parser_index_file(registry, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("index").joinpath("custom.index"))
+    parser = _parser_class(registry)(index_file=path)
+    assert parser.index_file == path
+    assert not registry.joinpath(parser.index_filename).exists()
+    assert parser.load_index()
+    assert list(parser.parsed["region"]) == [
+        {'Subtag': 'GB', 'Description': ('United Kingdom', ),
+         'Added': '2005-10-16'}]
+
+
+def test_index_parser_unwritable_index(registry):
+    with patch('bcp47.BCP47IndexParser.write_index') as m:
+        m.side_effect = OSError("Read-only file system")
+        parser = _parser_class(registry)()
+    assert m.called
+    assert not registry.joinpath(parser.index_filename).exists()
+    assert (
+        [record["Subtag"] for record in parser.parsed["language"]]
+        == ["ab", "aa"])
+
+
+def test_index_parser_unwritable_index_bcp47(registry):
+    path = str(registry.joinpath("missing", "registry.index"))
+    bcp = BCP47()
+    bcp.parser_class = partial(_parser_class(registry), index_file=path)
+    assert str(bcp("ab")) == "ab"
+    assert list(bcp["languages"]) == ["ab", "aa"]
+    assert list(bcp["grandfathereds"]) == ["i-ami"]
+    assert bcp["regions"]["GB"]["Description"] == ("United Kingdom", )
+    assert bcp._parser._index is None
+
+
+def test_indexed_tags(registry):
+    tags = _parser_class(registry)().tags("language")
+    assert isinstance(tags, IndexedTags)
+    assert len(tags) == 2
+    assert list(tags) == ["aa", "ab"]
+    assert "ab" in tags
+    assert "ac" not in tags
+    assert None not in tags
+    assert tags["ab"]["Suppress-Script"] == "Cyrl"
+    assert tags.get("zz") is None
+    with pytest.raises(KeyError):
+        tags["zz"]
+
+
+def test_indexed_bcp47(registry):
+    bcp = BCP47()
+    bcp.parser_class = _parser_class(registry)
+    assert list(bcp["languages"]) == ["aa", "ab"]
+    assert list(bcp["grandfathereds"]) == ["i-ami"]
+    assert (
+        bcp["regions"]["GB"]["Description"]
+        == ("United Kingdom", ))
+    assert str(bcp("ab")) == "ab"
@@ -0,0 +1,111 @@
+from types import MappingProxyType
+
+from bcp47 import indexes
+
+
+class DummyBCP47(object):
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __getitem__(self, k):
+        return self.tables.get(k, {})
+
+
+def test_preferred_values():
+    bcp47 = DummyBCP47(dict(
+        languages=dict(
+            iw={"Subtag": "iw", "Preferred-Value": "he"},
+            en={"Subtag": "en"}),
+        extlangs=dict(
+            yue={"Subtag": "yue", "Preferred-Value": "yue"}),
+        regions=dict(
+            BU={"Subtag": "BU", "Preferred-Value": "MM"}),
+        grandfathereds={
+            "i-klingon": {"Tag": "i-klingon", "Preferred-Value": "tlh"},
+            "i-default": {"Tag": "i-default"}},
+        redundants={
+            "sgn-BR": {"Tag": "sgn-BR", "Preferred-Value": "bzs"}}))
+    values = indexes.preferred_values(bcp47)
+    assert isinstance(values, MappingProxyType)
+    assert (
+        {k: dict(v) for k, v in values.items()}
+        == dict(
+            language=dict(iw="he"),
+            extlang=dict(yue="yue"),
+            script={},
+            region=dict(BU="MM"),
+            variant={},
+            tag={"i-klingon": "tlh", "sgn-BR": "bzs"}))
+
+
+def test_prefixes():
+    bcp47 = DummyBCP47(dict(
+        extlangs=dict(
+            yue={"Subtag": "yue", "Prefix": ["zh"]},
+            other={"Subtag": "other"}),
+        variants=dict(
+            biske={"Subtag": "biske", "Prefix": ["sl-rozaj"]},
+            pinyin={"Subtag": "pinyin", "Prefix": ["zh-Latn", "bo-Latn"]},
+            fonipa={"Subtag": "fonipa"})))
+    prefixes = indexes.prefixes(bcp47)
+    assert isinstance(prefixes, MappingProxyType)
+    assert dict(prefixes["extlang"]) == dict(yue=frozenset(["zh"]))
+    assert (
+        {k: dict(v) for k, v in prefixes["variant"].items()}
+        == dict(
+            biske={"sl-rozaj": frozenset(["sl", "rozaj"])},
+            pinyin={
+                "zh-Latn": frozenset(["zh", "Latn"]),
+                "bo-Latn": frozenset(["bo", "Latn"])}))
+
+
+def test_folded():
+    folded = indexes.folded(
+        {"Latn": {}, "GB": {}, "en-GB-oed": {}, "rozaj": {}})
+    assert isinstance(folded, MappingProxyType)
+    assert (
+        dict(folded)
+        == {"latn": "Latn", "gb": "GB", "en-gb-oed": "en-GB-oed",
+            "rozaj": "rozaj"})
+    bcp47 = DummyBCP47(dict(scripts={"Latn": {}}))
+    subtags = indexes.FoldedSubtags(bcp47)
+    assert subtags["scripts"]["latn"] == "Latn"
+    assert dict(subtags["regions"]) == {}
+    assert sorted(subtags) == ["regions", "scripts"]
+
+
+def test_likely_subtag_parts():
+    assert indexes.likely_subtag_parts("und") == (None, None, None)
+    assert indexes.likely_subtag_parts("zh") == ("zh", None, None)
+    assert (
+        indexes.likely_subtag_parts("und_Hant")
+        == (None, "Hant", None))
+    assert (
+        indexes.likely_subtag_parts("zh-Hant-TW")
+        == ("zh", "Hant", "TW"))
+    assert (
+        indexes.likely_subtag_parts("es_419")
+        == ("es", None, "419"))
+
+
+def test_likely_subtags(tmp_path):
+    bcp47 = DummyBCP47(dict(
+        languages=dict(
+            en={"Subtag": "en", "Suppress-Script": "Latn"},
+            zh={"Subtag": "zh"})))
+    likely = indexes.likely_subtags(bcp47)
+    assert isinstance(likely, MappingProxyType)
+    assert dict(likely) == {("en", None, None): ("en", "Latn", None)}
+    path = tmp_path.joinpath("likely.json")
+    path.write_text(
+        '{"supplemental": {"likelySubtags": '
+        '{"zh": "zh-Hans-CN", "und-Hant": "zh-Hant-TW"}}}')
+    bcp47.likely_subtags_file = str(path)
+    assert dict(indexes.likely_subtags(bcp47)) == {
+        ("en", None, None): ("en", "Latn", None),
+        ("zh", None, None): ("zh", "Hans", "CN"),
+        (None, "Hant", None): ("zh", "Hant", "TW")}
+    path.write_text('{"en": "en-Latn-US"}')
+    assert dict(indexes.likely_subtags(bcp47)) == {
+        ("en", None, None): ("en", "Latn", "US")}
@@ -0,0 +1,52 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from bcp47.__main__ import main
+
+
+@patch('bcp47.BCP47Parser.write_snapshot')
+@patch('bcp47.BCP47Parser.parse_src')
+@patch('bcp47.BCP47Parser.parse_bcp')
+def test_main_snapshot(m_parse, m_src, m_write, capsys):
+    m_write.return_value = "SNAPSHOT PATH"
+    assert main(["snapshot", "-o", "OUTPUT"]) is None
+    assert m_src.called
+    assert (
+        list(m_write.call_args)
+        == [("OUTPUT", ), {}])
+    assert capsys.readouterr().out == "SNAPSHOT PATH\n"
+
+
+@patch('bcp47.BCP47Parser.snapshot_filename', None)
+@patch('bcp47.BCP47Parser.write_snapshot')
+@patch('bcp47.BCP47Parser.parse_bcp')
+def test_main_snapshot_no_file(m_parse, m_write):
+    assert (
+        main(["snapshot"])
+        == "BCP47Parser has no snapshot file")
+    assert not m_write.called
+
+
+def test_main_no_command():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+def test_main_diff(tmp_path, capsys):
+    old = tmp_path.joinpath("old.txt")
+    new = tmp_path.joinpath("new.txt")
+    record = "%%\nType: region\nSubtag: GB\nDescription: United Kingdom\n"
+    old.write_text("File-Date: 2019-09-16\n" + record)
+    new.write_text(
+        "File-Date: 2020-01-01\n" + record
+        + "%%\nType: region\nSubtag: QM\nDescription: Private use\n")
+    assert main(["diff", str(old), str(new)]) is None
+    assert capsys.readouterr().out == "added region QM\n"
+    assert main(["diff", "--json", str(old), str(new)]) is None
+    data = json.loads(capsys.readouterr().out)
+    assert data["new_file_date"] == "2020-01-01"
+    assert (
+        [(change["kind"], change["key"]) for change in data["changes"]]
+        == [("added", "QM")])
@@ -0,0 +1,83 @@
+import pytest
+
+from bcp47 import AcceptLanguage, BCP47, BCP47Exception, LanguageMatcher
+
+
+CATALOG = (
+    "de-DE", "de-CH-1901", "de-Latn-DE", "de-Latf-DE", "de-x-DE", "de",
+    "en-GB", "en", "de-DE-x-goethe", "zh-Hant-TW", "de-Deva-DE", "de-DE")
+
+
+@pytest.fixture
+def matcher():
+    return BCP47().matcher(CATALOG)
+
+
+def _tags(codes):
+    return [str(code) for code in codes]
+
+
+def test_matcher(matcher):
+    assert isinstance(matcher, LanguageMatcher)
+    # duplicates are dropped
+    assert len(matcher) == len(CATALOG) - 1
+    bcp = BCP47()
+    assert len(LanguageMatcher(bcp, [bcp("en"), "en-GB"])) == 2
+    with pytest.raises(BCP47Exception):
+        bcp.matcher(["en", "xx-QQ"])
+
+
+def test_matcher_filter(matcher):
+    assert (
+        _tags(matcher.filter("de-de"))
+        == ["de-DE", "de-DE-x-goethe"])
+    assert (
+        _tags(matcher.filter("de"))
+        == ["de-DE", "de-CH-1901", "de-Latn-DE", "de-Latf-DE", "de-x-de",
+            "de", "de-DE-x-goethe", "de-Deva-DE"])
+    assert _tags(matcher.filter("de-d")) == []
+    assert _tags(matcher.filter("fr")) == []
+    assert _tags(matcher.filter("*")) == _tags(matcher.codes)
+    assert (
+        _tags(matcher.filter(["en", "zh", "en-GB", "*"]))[:4]
+        == ["en-GB", "en", "zh-Hant-TW", "de-DE"])
+    assert len(matcher.filter(["en", "*"])) == len(matcher)
+
+
+def test_matcher_filter_extended(matcher):
+    # the examples of RFC 4647 section 3.3.2
+    assert (
+        _tags(matcher.filter_extended("de-*-DE"))
+        == ["de-DE", "de-Latn-DE", "de-Latf-DE", "de-DE-x-goethe",
+            "de-Deva-DE"])
+    assert (
+        matcher.filter_extended("de-*-de")
+        == matcher.filter_extended("de-DE")
+        == matcher.filter_extended("*-DE")
+        == matcher.filter_extended("de-DE-*"))
+    assert _tags(matcher.filter_extended("de-x-de")) == ["de-x-de"]
+    assert _tags(matcher.filter_extended("de-1901")) == ["de-CH-1901"]
+    assert _tags(matcher.filter_extended("de-goethe")) == []
+    assert _tags(matcher.filter_extended("*")) == _tags(matcher.codes)
+    assert (
+        _tags(matcher.filter_extended(["*-TW", "en"]))
+        == ["zh-Hant-TW", "en-GB", "en"])
+
+
+def test_matcher_lookup(matcher):
+    bcp = BCP47()
+    assert matcher.lookup("fr") is None
+    assert matcher.lookup("fr", "en") == "en"
+    assert str(matcher.lookup("en-US")) == "en"
+    assert str(matcher.lookup("de-DE-x-goethe")) == "de-DE-x-goethe"
+    # trailing singletons are removed with the subtag after them
+    assert str(matcher.lookup("de-DE-x-schiller")) == "de-DE"
+    assert str(matcher.lookup("zh-Hant-TW-x-private")) == "zh-Hant-TW"
+    assert matcher.lookup("zh-Hant-CN") is None
+    assert str(matcher.lookup(["*", "fr", "EN-gb"])) == "en-GB"
+    assert (
+        str(matcher.lookup(bcp.accept_language("fr, de-CH;q=0.8")))
+        == "de")
+    assert (
+        str(matcher.lookup([AcceptLanguage("en-AU", "en-AU", 1.0)]))
+        == "en")
@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+import pytest
+
+from bcp47 import BCP47, BCP47Parser, BCP47Result, parallel
+
+
+TAGS = ["en-GB", "en-1994", "iw-IL", "xx-QQ", "i-klingon", "de"] * 5
+
+
+@pytest.fixture
+def worker():
+    yield
+    parallel._worker = None
+
+
+def test_chunked():
+    assert list(parallel.chunked([], 2)) == []
+    assert (
+        list(parallel.chunked(iter(range(5)), 2))
+        == [[0, 1], [2, 3], [4]])
+
+
+def test_init_worker(tmp_path, worker):
+    bcp = BCP47()
+    snapshot = bcp.parser_class(
+        None, str(tmp_path.joinpath("missing"))).write_snapshot(
+            str(tmp_path.joinpath("snapshot")))
+    with patch('bcp47.parser.LazyParsed') as m:
+        parallel.init_worker(BCP47, BCP47Parser, None, snapshot, True)
+    assert not m.called
+    assert parallel._worker.strict
+    assert parallel._worker.parsed["region"]
+    assert (
+        parallel.validate_chunk((["en-1994", "iw"], True))
+        == [BCP47Result(
+            "en-1994", None,
+            "Variant '1994' not allowed with prefix 'en'"),
+            BCP47Result("iw", "he", None)])
+
+
+def test_validate_parallel():
+    bcp = BCP47(strict=True)
+    assert (
+        list(bcp.validate_parallel(TAGS, processes=2, chunk_size=4))
+        == list(bcp.validate_many(TAGS)))
+    assert (
+        sorted(bcp.validate_parallel(
+            iter(TAGS), canonicalize=True, processes=2, chunk_size=4,
+            ordered=False))
+        == sorted(bcp.canonicalize_many(TAGS)))
+    assert list(bcp.validate_parallel([], processes=2)) == []
+
+
+def test_validate_file(tmp_path):
+    path = tmp_path.joinpath("tags.txt")
+    path.write_text("en-GB\n\n  iw-IL \nxx-QQ\n")
+    bcp = BCP47()
+    assert (
+        list(bcp.validate_file(
+            str(path), canonicalize=True, processes=2, chunk_size=1))
+        == list(bcp.canonicalize_many(["en-GB", "iw-IL", "xx-QQ"])))
@@ -1,6 +1,9 @@
 
+import marshal
 from unittest.mock import PropertyMock, patch
 
+import pytest
+
 import bcp47
 from bcp47 import BCP47Parser
 
@@ -33,13 +36,13 @@ def test_parser_src_file(m_dirname, m_join, m):
 def test_parser_open(m_open, m_src, m):
     m_src.return_value = "SRC FILE"
     m_file = m_open.return_value.__enter__.return_value
-    m_file.read.return_value = "\n".join(["1", "2", "3"])
+    m_file.__iter__.return_value = iter(["1\n", "2\n", "3"])
     parser = BCP47Parser()
     result = list(parser.open())
     assert (
         list(m_open.call_args)
         == [('SRC FILE',), {}])
-    assert m_open.return_value.__enter__.return_value.read.called
+    assert not m_file.read.called
     assert result == ['1', '2', '3']
 
 
@@ -55,8 +58,223 @@ Subtag: ab
 Description: Abkhazian
 Added: 2005-10-16
 Suppress-Script: Cyrl
+%%
+Type: region
+Subtag: AA
+Description: Private use
+Added: 2005-10-16
+%%
+Type: variant
+Subtag: pinyin
+Description: Pinyin romanization
+Added: 2008-10-14
+Prefix: zh-Latn
+Prefix: bo-Latn
+Comments: Pinyin romanization
+  system
 """
 
 
+class LinesParser(BCP47Parser):
+
+    def __init__(self, markup):
+        self.markup = markup
+        super().__init__()
+
+    def open(self):
+        return iter(self.markup.split("\n"))
+
+    def parse_bcp(self):
+        self.parsed = self.parse_src()
+
+
 def test_simple_parse():
-    pass
+    parser = LinesParser(markup_simple)
+    assert list(parser.parsed) == ["language", "region", "variant"]
+    assert (
+        [item["Subtag"] for item in parser.parsed["language"]]
+        == ["aa", "ab"])
+    assert (
+        parser.parsed["language"][1]
+        == {"Subtag": "ab",
+            "Description": ("Abkhazian", ),
+            "Added": "2005-10-16",
+            "Suppress-Script": "Cyrl"})
+    assert parser.parsed["variant"][0]["Prefix"] == ("zh-Latn", "bo-Latn")
+    assert (
+        parser.parsed["variant"][0]["Comments"]
+        == "Pinyin romanization  system")
+
+
+def test_parser_records():
+    parser = LinesParser(markup_simple)
+    records = parser.records()
+    assert next(records) == (
+        "language",
+        {"Subtag": "aa", "Description": ("Afar", ), "Added": "2005-10-16"})
+    assert [type_ for type_, item in records] == [
+        "language", "region", "variant"]
+    assert (
+        [item["Subtag"] for type_, item in parser.records(["region"])]
+        == ["AA"])
+    assert (
+        parser.parse_src(types=("region", "variant"))
+        == {"region": parser.parsed["region"],
+            "variant": parser.parsed["variant"]})
+    assert list(parser.records(["script"])) == []
+
+
+class TmpParser(BCP47Parser):
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__()
+
+    @property
+    def src_file(self):
+        return str(self.path.joinpath("registry.txt"))
+
+
+def _tmp_registry(tmp_path, file_date="2019-09-16"):
+    tmp_path.joinpath("registry.txt").write_text(
+        "File-Date: %s%s" % (file_date, markup_simple))
+    return tmp_path
+
+
+def test_parser_snapshot_file(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    assert (
+        parser.snapshot_file
+        == str(tmp_path.joinpath(parser.snapshot_filename)))
+    parser.snapshot_filename = None
+    assert parser.snapshot_file is None
+    assert parser.load_snapshot() is None
+
+
+def test_parser_file_date(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    assert parser.file_date == "2019-09-16"
+    assert (
+        parser.snapshot_header
+        == (bcp47.parser.SNAPSHOT_VERSION,
+            bcp47.parser.marshal.version,
+            "2019-09-16"))
+
+
+def test_parser_snapshot_roundtrip(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    assert parser.load_snapshot() is None
+    assert parser.write_snapshot() == parser.snapshot_file
+    assert parser.load_snapshot() == parser.parsed
+
+    with patch('bcp47.BCP47Parser.parse_src') as m:
+        assert TmpParser(tmp_path).parsed == parser.parsed
+    assert not m.called
+
+
+def test_parser_snapshot_stale(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    parser.write_snapshot()
+    _tmp_registry(tmp_path, "2020-01-01")
+    assert parser.load_snapshot() is None
+    parsed = TmpParser(tmp_path).parsed
+    assert isinstance(parsed, bcp47.parser.LazyParsed)
+    assert parsed == parser.parsed
+
+
+def test_parser_snapshot_corrupt(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    tmp_path.joinpath(parser.snapshot_filename).write_bytes(b"\x00")
+    assert parser.load_snapshot() is None
+    header = parser.snapshot_header
+    for data in ((1, {}), (1, 2, 3), (header, [1]), (header, {"x": 1})):
+        tmp_path.joinpath(parser.snapshot_filename).write_bytes(
+            marshal.dumps(data))
+        assert parser.load_snapshot() is None
+    tmp_path.joinpath(parser.snapshot_filename).unlink()
+    tmp_path.joinpath(parser.snapshot_filename).mkdir()
+    assert parser.load_snapshot() is None
+    assert isinstance(
+        TmpParser(tmp_path).parsed, bcp47.parser.LazyParsed)
+
+
+def test_parser_offsets(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    offsets = parser.offsets()
+    assert list(offsets) == ["language", "region", "variant"]
+    assert all(len(ranges) == 1 for ranges in offsets.values())
+    data = tmp_path.joinpath("registry.txt").read_bytes()
+    assert offsets["language"][0][0] == data.index(b"%%")
+    assert offsets["language"][0][1] == offsets["region"][0][0]
+    assert offsets["variant"][0][1] == len(data)
+    for type_, ranges in offsets.items():
+        start, end = ranges[0]
+        assert data[start:end].startswith(
+            ("%%%%\nType: %s\n" % type_).encode())
+
+
+def test_parser_offsets_split(tmp_path):
+    tmp_path.joinpath("registry.txt").write_text(
+        "File-Date: 2019-09-16\n"
+        "%%\nType: region\nSubtag: AA\n"
+        "%%\nType: language\nSubtag: aa\n"
+        "%%\nType: region\nSubtag: ZZ\n"
+        "%%\nSubtag: QQ\nType: region\n")
+    parser = TmpParser(tmp_path)
+    assert [len(r) for r in parser.offsets().values()] == [2, 1]
+    assert (
+        [item["Subtag"] for item in parser.parse_type("region")]
+        == ["AA", "ZZ", "QQ"])
+    assert parser.parse_type("script") == []
+
+
+def test_parser_lazy_bundled():
+    # the bundled registry has multi-line values and records spanning
+    # the read buffer, each type parsed from its ranges is as when the
+    # whole file is parsed
+    parser = BCP47Parser(snapshot_file="")
+    offsets = parser.offsets()
+    assert {
+        type_: parser.parse_type(type_, offsets)
+        for type_
+        in offsets} == parser.parse_src()
+
+
+def test_parser_lazy(tmp_path):
+    parser = TmpParser(_tmp_registry(tmp_path))
+    parsed = parser.parsed
+    assert isinstance(parsed, bcp47.parser.LazyParsed)
+    assert parsed.loaded == ()
+    assert list(parsed) == ["language", "region", "variant"]
+    assert len(parsed) == 3
+    assert [item["Subtag"] for item in parsed["region"]] == ["AA"]
+    assert parsed.loaded == ("region", )
+    assert parsed["region"] is parsed["region"]
+    with pytest.raises(KeyError):
+        parsed["script"]
+    assert parsed.loaded == ("region", )
+    assert parsed == parser.parse_src()
+
+
+def test_parser_lazy_tables(tmp_path):
+    _tmp_registry(tmp_path)
+
+    class Parser(TmpParser):
+
+        def __init__(self):
+            super().__init__(tmp_path)
+
+    bcp = bcp47.BCP47()
+    bcp.parser_class = Parser
+    assert list(bcp["regions"]) == ["AA"]
+    assert bcp.parsed.loaded == ("region", )
+    assert list(bcp["languages"]) == ["aa", "ab"]
+    assert bcp.parsed.loaded == ("region", "language")
+
+
+def test_parser_custom_src_file(tmp_path):
+    src = str(_tmp_registry(tmp_path).joinpath("registry.txt"))
+    parser = BCP47Parser(src)
+    assert parser.src_file == src
+    assert parser.file_date == "2019-09-16"
+    assert list(parser.parsed) == ["language", "region", "variant"]
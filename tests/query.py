@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+from bcp47 import BCP47, Query
+from bcp47.query import FieldIndex
+
+
+TAGS = dict(
+    en=dict(Subtag="en", Added="2005-10-16", **{"Suppress-Script": "Latn"}),
+    de=dict(Subtag="de", Added="2005-10-16", **{"Suppress-Script": "Latn"}),
+    cmn=dict(Subtag="cmn", Added="2009-07-29", Macrolanguage="zh"),
+    yue=dict(Subtag="yue", Added="2009-07-29", Macrolanguage="zh"),
+    iw=dict(
+        Subtag="iw", Added="2005-10-16", Deprecated="1989-01-01",
+        **{"Suppress-Script": "Hebr"}),
+    sgn=dict(Subtag="sgn", Added="2005-10-16", Prefix=["a", "b"]))
+
+
+class DummyBCP47(object):
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.indexes = {}
+
+    def __getitem__(self, k):
+        return self.tables[k]
+
+    def field_index(self, table, field):
+        key = (table, field)
+        if key not in self.indexes:
+            self.indexes[key] = FieldIndex(self.tables[table], field)
+        return self.indexes[key]
+
+
+def test_field_index():
+    index = FieldIndex(TAGS, "Suppress-Script")
+    assert index.values == dict(
+        Latn=frozenset(["en", "de"]), Hebr=frozenset(["iw"]))
+    assert index.present == frozenset(["en", "de", "iw"])
+    assert index.get() == index.present
+    assert index.get("Latn") == frozenset(["en", "de"])
+    assert index.get("Latn", "Hebr", "Cyrl") == index.present
+    assert index.get("Cyrl") == frozenset()
+    assert FieldIndex(TAGS, "Prefix").get("b") == frozenset(["sgn"])
+    assert FieldIndex(TAGS, None).present == frozenset(TAGS)
+    assert FieldIndex(TAGS, None).get("en") == frozenset()
+
+
+def test_field_index_between():
+    index = FieldIndex(TAGS, "Added")
+    assert index.between() == frozenset(TAGS)
+    assert index.between("2009-07-29") == frozenset(["cmn", "yue"])
+    assert index.between("2006") == frozenset(["cmn", "yue"])
+    assert (
+        index.between(end="2009-07-28")
+        == frozenset(["en", "de", "iw", "sgn"]))
+    assert index.between("2005-10-16", "2005-10-16") == (
+        frozenset(["en", "de", "iw", "sgn"]))
+    assert index.between("2010") == frozenset()
+
+
+def test_query():
+    bcp = DummyBCP47(dict(languages=TAGS))
+    query = Query(bcp, "languages")
+    assert len(query) == 6
+    assert list(query) == sorted(TAGS)
+    assert list(query.where("Macrolanguage", "zh")) == ["cmn", "yue"]
+    assert list(query.where("Deprecated")) == ["iw"]
+    assert list(query.exclude("Deprecated").where("Suppress-Script")) == [
+        "de", "en"]
+    latin = query.where("Suppress-Script", "Latn")
+    assert isinstance(latin, Query)
+    assert "en" in latin
+    assert "cmn" not in latin
+    assert latin.items() == [("de", TAGS["de"]), ("en", TAGS["en"])]
+    assert list(query.between("Added", "2009-01-01")) == ["cmn", "yue"]
+    assert list(
+        query.between("Added", end="2009-01-01").exclude(
+            "Suppress-Script", "Hebr").where("Suppress-Script")) == [
+        "de", "en"]
+    assert len(query.where("Macrolanguage", "xx")) == 0
+    # queries are not changed by narrowing them
+    assert len(query) == 6
+    assert set(bcp.indexes) == set([
+        ("languages", None), ("languages", "Macrolanguage"),
+        ("languages", "Deprecated"), ("languages", "Suppress-Script"),
+        ("languages", "Added")])
+
+
+@patch('bcp47.FieldIndex')
+def test_field_index_memo(m):
+    bcp = BCP47()
+    assert bcp.field_index("languages", "Added") is m.return_value
+    assert bcp.field_index("languages", "Added") is m.return_value
+    assert m.call_count == 1
+    assert list(m.call_args) == [(bcp["languages"], "Added"), {}]
+    bcp.field_index("scripts", "Added")
+    assert m.call_count == 2
+    bcp.reload()
+    bcp.field_index("languages", "Added")
+    assert m.call_count == 3
+
+
+def test_query_registry():
+    bcp = BCP47()
+    chinese = bcp.query("languages").where("Macrolanguage", "zh")
+    assert "cmn" in chinese
+    assert "yue" in chinese
+    assert "en" not in chinese
+    assert "Cyrl" in bcp.query("scripts").between("Added", end="2005-10-16")
@@ -0,0 +1,67 @@
+import datetime
+import pickle
+
+import pytest
+
+from bcp47.records import (
+    LanguageRecord, RedundantRecord, UnknownRecord, VariantRecord,
+    make_record)
+
+
+def test_make_record():
+    record = make_record(
+        "language",
+        {"Subtag": "ab", "Description": ["Abkhazian"],
+         "Added": "2005-10-16", "Suppress-Script": "Cyrl"})
+    assert isinstance(record, LanguageRecord)
+    assert record.subtag == "ab"
+    assert record.description == ("Abkhazian", )
+    assert record.suppress_script == "Cyrl"
+    assert record.deprecated is None
+    assert record.added == datetime.date(2005, 10, 16)
+    assert record["Added"] == "2005-10-16"
+    assert not hasattr(record, "__dict__")
+    assert isinstance(make_record("redundant", {}), RedundantRecord)
+    assert isinstance(make_record("new", {}), UnknownRecord)
+
+
+def test_record_mapping():
+    values = {
+        "Subtag": "rozaj", "Description": ["Resian"],
+        "Added": "2005-10-16", "Prefix": ["sl"]}
+    record = make_record("variant", values)
+    assert isinstance(record, VariantRecord)
+    assert record == {**values, "Prefix": ("sl", ), "Description": (
+        "Resian", )}
+    assert record == make_record("variant", values)
+    assert record != make_record("variant", dict(values, Prefix=["de"]))
+    assert len(record) == 4
+    assert sorted(record) == ["Added", "Description", "Prefix", "Subtag"]
+    assert record.get("Prefix") == ("sl", )
+    assert record.get("Deprecated") is None
+    assert "Deprecated" not in record
+    with pytest.raises(KeyError):
+        record["Deprecated"]
+    assert dict(record) == {
+        "Subtag": "rozaj", "Description": ("Resian", ),
+        "Added": "2005-10-16", "Prefix": ("sl", )}
+
+
+def test_record_extra_fields():
+    record = make_record("script", {"Subtag": "Latn", "Scope": "special"})
+    assert record["Scope"] == "special"
+    assert dict(record) == {"Subtag": "Latn", "Scope": "special"}
+
+
+def test_record_interned():
+    first = make_record("language", {"Subtag": "".join(["e", "n"])})
+    second = make_record("language", {"Subtag": "".join(["e", "n"])})
+    assert first.subtag is second.subtag
+
+
+def test_record_pickle():
+    record = make_record(
+        "variant", {"Subtag": "rozaj", "Prefix": ["sl"]})
+    copied = pickle.loads(pickle.dumps(record))
+    assert type(copied) is VariantRecord
+    assert copied == record
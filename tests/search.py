@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from bcp47 import BCP47, SearchResult
+from bcp47.search import DescriptionIndex, fold
+
+
+class DummyBCP47(object):
+    mapping = dict(
+        languages=("language", ),
+        scripts=("script", ),
+        regions=("region", ),
+        redundants=("redundant", "Tag"))
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def __getitem__(self, k):
+        return self.tables.get(k, {})
+
+
+def _record(subtag, *descriptions, **kwargs):
+    record = dict(Subtag=subtag, Description=list(descriptions))
+    record.update(kwargs)
+    return record
+
+
+TABLES = dict(
+    languages=dict(
+        pt=_record("pt", "Portuguese"),
+        la=_record("la", "Latin"),
+        psr=_record("psr", "Portuguese Sign Language"),
+        idb=_record("idb", "Indo-Portuguese"),
+        asf=_record("asf", "Auslan", "Australian Sign Language"),
+        sgn=_record("sgn", "Sign languages"),
+        pob=_record("pob", "Portuguese", Deprecated="2020-01-01")),
+    scripts=dict(
+        Latn=_record("Latn", "Latin"),
+        Latf=_record("Latf", "Latin (Fraktur variant)")),
+    regions=dict(
+        PT=_record("PT", "Portugal"),
+        CI=_record("CI", "Côte d'Ivoire")),
+    redundants={
+        "uz-Latn": _record("uz-Latn", "Uzbek in Latin script")})
+
+
+def _subtags(results):
+    return [result.subtag for result in results]
+
+
+def test_fold():
+    assert fold("Côte d'Ivoire") == "cote d'ivoire"
+    assert fold("STRASSE") == fold("straße") == "strasse"
+
+
+def test_description_index():
+    index = DescriptionIndex(DummyBCP47(TABLES))
+    assert len(index) == 12
+    assert index.search("") == []
+    assert index.search("  - ") == []
+    assert index.search("zzz") == []
+    assert (
+        _subtags(index.search("Portug"))
+        == ["PT", "pt", "idb", "psr", "pob"])
+    # whole descriptions, then exact words, then prefixes
+    assert (
+        _subtags(index.search("portuguese"))
+        == ["pt", "pob", "idb", "psr"])
+    assert (
+        _subtags(index.search("latin"))
+        == ["Latn", "la", "uz-Latn", "Latf"])
+    assert _subtags(index.search("COTE")) == ["CI"]
+    assert _subtags(index.search("ivoire côte")) == ["CI"]
+    # first descriptions before others
+    assert _subtags(index.search("sign lang")) == ["sgn", "psr", "asf"]
+    assert _subtags(index.search("latin", limit=2)) == ["Latn", "la"]
+    assert (
+        _subtags(index.search("latin", types=["script", "redundant"]))
+        == ["Latn", "uz-Latn", "Latf"])
+    assert index.search("latin", types=["variant"]) == []
+    result = index.search("Portugal")[0]
+    assert isinstance(result, SearchResult)
+    assert result == ("region", "PT", TABLES["regions"]["PT"])
+
+
+@patch('bcp47.DescriptionIndex')
+def test_search(m):
+    bcp = BCP47()
+    assert bcp.description_index is m.return_value
+    assert bcp.description_index is m.return_value
+    assert m.call_count == 1
+    assert bcp.search("QUERY") is m.return_value.search.return_value
+    assert (
+        list(m.return_value.search.call_args)
+        == [("QUERY", None, 20), {}])
+    bcp.search("QUERY", ["script"], 5)
+    assert (
+        list(m.return_value.search.call_args)
+        == [("QUERY", ["script"], 5), {}])
+
+
+def test_search_registry():
+    bcp = BCP47()
+    assert bcp.search("Cyrillic", limit=1)[0].subtag == "Cyrl"
+    assert (
+        [(r.type, r.subtag) for r in bcp.search("portug", limit=2)]
+        == [("region", "PT"), ("language", "pt")])